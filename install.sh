@@ -56,6 +56,15 @@ else
     fi
 fi
 
+# Cache the tokenizer so hooks start fast and never need the network
+if python3 -c "import tiktoken" 2>/dev/null; then
+    if python3 "$PLUGIN_DIR/scripts/count-tokens.py" --warm > /dev/null 2>&1; then
+        echo "tiktoken: encoder cached in ~/.claude/memento-tiktoken"
+    else
+        echo "tiktoken: could not cache encoder (run count-tokens.py --warm later)"
+    fi
+fi
+
 echo ""
 echo "Installation complete!"
 echo ""
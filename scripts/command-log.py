@@ -0,0 +1,488 @@
+#!/usr/bin/env python3
+"""
+Memento - Binary Command Log
+"Short-term memory loss." — Remember more commands in fewer bytes.
+
+Compact append-only encoding of the command log (~/.claude/memento-commands.bin).
+
+Layout:
+    header   b"MMCL" + uint16 version + uint16 reserved
+    records  uint32 payload length + payload
+
+Payloads start with a one-byte kind:
+    STRING   kind, uint32 id, UTF-8 bytes     (interned project/command text)
+    ENTRY    kind, int64 epoch microseconds, uint32 project id, uint32 command id
+    OUTPUT   ENTRY fields + uint32 output tokens   (entries with a known output cost)
+
+Strings are written once and referenced by id, so a repeated `git status`
+costs 21 bytes per entry instead of a pretty-printed JSON object. Scanning
+maps the file and unpacks records in place without copying them.
+
+Writers lock the file while appending and keep the string table in a sidecar
+index, so concurrent hooks agree on ids and opening the log never rescans it.
+The log is rotated to memento-commands.bin.1 once it reaches 2 MiB.
+"""
+
+import fcntl
+import json
+import mmap
+import os
+import struct
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, Optional
+
+BINARY_FILE = Path.home() / ".claude" / "memento-commands.bin"
+JSON_FILE = Path.home() / ".claude" / "memento-commands.json"
+
+MAX_LOG_BYTES = 2 * 1024 * 1024   # Rotate to .1 beyond this (~100k entries)
+
+MAGIC = b"MMCL"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+LENGTH = struct.Struct("<I")
+KIND = struct.Struct("<B")
+STRING_HEAD = struct.Struct("<BI")
+ENTRY = struct.Struct("<BqII")
+OUTPUT_ENTRY = struct.Struct("<BqIII")
+
+KIND_STRING = 1
+KIND_ENTRY = 2
+KIND_OUTPUT_ENTRY = 3
+
+
+class CommandLogError(Exception):
+    """Raised when a binary command log is malformed."""
+
+
+def _open_map(path: Path) -> Optional[mmap.mmap]:
+    """Memory-map a log file read-only, validating its header."""
+    if not path.exists() or path.stat().st_size < HEADER.size:
+        return None
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, _ = HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != VERSION:
+        mapped.close()
+        raise CommandLogError(f"{path}: not a memento command log (v{VERSION})")
+    return mapped
+
+
+def iter_records(path: Path = BINARY_FILE) -> Iterator[tuple]:
+    """Yield raw records straight from the mapped file.
+
+    Strings are yielded as ("string", id, bytes) and entries as
+    ("entry", timestamp_us, project_id, command_id, output_tokens), with
+    output_tokens None when it was not recorded. Entries are unpacked in
+    place; only the (rare) string records are copied out. A partially written
+    trailing record is ignored.
+    """
+    mapped = _open_map(path)
+    if mapped is None:
+        return
+    try:
+        offset = HEADER.size
+        end = len(mapped)
+        while offset + LENGTH.size <= end:
+            (length,) = LENGTH.unpack_from(mapped, offset)
+            start = offset + LENGTH.size
+            if start + length > end:
+                break  # Torn write at the tail
+            (kind,) = KIND.unpack_from(mapped, start)
+            if kind == KIND_ENTRY:
+                _, ts, project_id, command_id = ENTRY.unpack_from(mapped, start)
+                yield ("entry", ts, project_id, command_id, None)
+            elif kind == KIND_OUTPUT_ENTRY:
+                _, ts, project_id, command_id, output_tokens = OUTPUT_ENTRY.unpack_from(mapped, start)
+                yield ("entry", ts, project_id, command_id, output_tokens)
+            elif kind == KIND_STRING:
+                _, string_id = STRING_HEAD.unpack_from(mapped, start)
+                yield ("string", string_id, mapped[start + STRING_HEAD.size:start + length])
+            offset = start + length
+    finally:
+        mapped.close()
+
+
+def load_strings(path: Path = BINARY_FILE) -> dict[int, str]:
+    """Decode the interned string table, keyed by stored id."""
+    strings = {}
+    for record in iter_records(path):
+        if record[0] == "string":
+            strings[record[1]] = record[2].decode("utf-8")
+    return strings
+
+
+def iter_entries(path: Path = BINARY_FILE) -> Iterator[dict]:
+    """Yield entries in the same shape as memento-commands.json."""
+    strings = {}
+    for record in iter_records(path):
+        if record[0] == "string":
+            strings[record[1]] = record[2].decode("utf-8")
+        else:
+            _, ts, project_id, command_id, output_tokens = record
+            entry = {
+                "command": strings.get(command_id, ""),
+                "project": strings.get(project_id, ""),
+                "timestamp": datetime.fromtimestamp(ts / 1_000_000).isoformat()
+            }
+            if output_tokens is not None:
+                entry["output_tokens"] = output_tokens
+            yield entry
+
+
+def rotated_path(path: Path) -> Path:
+    return path.with_name(path.name + ".1")
+
+
+def index_path(path: Path) -> Path:
+    return path.with_name(path.name + ".idx")
+
+
+def log_files(path: Path = BINARY_FILE) -> list[Path]:
+    """The rotated log (if any) and the current one, oldest first."""
+    return [p for p in (rotated_path(path), path) if p.exists()]
+
+
+class CommandLogWriter:
+    """Append entries to a binary log, interning strings as it goes.
+
+    Every append holds an exclusive flock on the log, first reading any
+    records other writers appended since this writer last looked, so string
+    ids stay unique across concurrent hooks. A torn record left by an
+    interrupted writer is truncated before appending.
+
+    Opening does not rescan the log: the string table and the offset it
+    covers are kept in a sidecar index (memento-commands.bin.idx), written on
+    close. Once the log reaches max_bytes it is rotated to
+    memento-commands.bin.1 (replacing the previous one) and a new log with a
+    fresh string table is started, so disk use and open cost stay bounded.
+    """
+
+    def __init__(self, path: Path = BINARY_FILE, max_bytes: Optional[int] = MAX_LOG_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.file = None
+        self._open()
+
+    def _open(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        self.file = open(self.path, "a+b", buffering=0)
+        stat = os.fstat(self.file.fileno())
+        self.ino = stat.st_ino
+        self.ids = {}
+        self.next_id = 0
+        self.offset = 0   # End of the records this writer has seen
+        self._load_index(stat.st_size)
+
+    def _load_index(self, size: int) -> None:
+        try:
+            with open(index_path(self.path), "r") as f:
+                index = json.load(f)
+            if index["ino"] != self.ino or not HEADER.size <= index["offset"] <= size:
+                return
+            strings = index["strings"]
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return
+        self.ids = {text: i for i, text in enumerate(strings) if text is not None}
+        self.next_id = len(strings)
+        self.offset = index["offset"]
+
+    def _save_index(self) -> None:
+        strings = [None] * self.next_id
+        for text, string_id in self.ids.items():
+            strings[string_id] = text
+        target = index_path(self.path)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"ino": self.ino, "offset": self.offset, "strings": strings}, f,
+                      separators=(",", ":"))
+        os.replace(tmp, target)
+
+    def _lock(self) -> None:
+        """Lock the log, following a rotation by another writer."""
+        while True:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == self.ino:
+                    return
+            except FileNotFoundError:
+                pass
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+            self._open()
+
+    def _unlock(self) -> None:
+        fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+    def _sync(self) -> None:
+        """Learn string ids from records appended since self.offset (lock held)."""
+        fd = self.file.fileno()
+        size = os.fstat(fd).st_size
+        if size < HEADER.size:
+            os.ftruncate(fd, 0)   # New log, or a torn header
+            self.file.write(HEADER.pack(MAGIC, VERSION, 0))
+            self.ids, self.next_id, self.offset = {}, 0, HEADER.size
+            return
+        if self.offset < HEADER.size:
+            self.file.seek(0)
+            magic, version, _ = HEADER.unpack(self.file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise CommandLogError(f"{self.path}: not a memento command log (v{VERSION})")
+            self.offset = HEADER.size
+        if self.offset >= size:
+            return
+
+        self.file.seek(self.offset)
+        data = self.file.read(size - self.offset)
+        pos = 0
+        while pos + LENGTH.size <= len(data):
+            (length,) = LENGTH.unpack_from(data, pos)
+            start = pos + LENGTH.size
+            if length == 0 or start + length > len(data):
+                break
+            if data[start] == KIND_STRING:
+                _, string_id = STRING_HEAD.unpack_from(data, start)
+                text = data[start + STRING_HEAD.size:start + length].decode("utf-8", errors="replace")
+                self.ids[text] = string_id
+                self.next_id = max(self.next_id, string_id + 1)
+            pos = start + length
+        self.offset += pos
+        if self.offset < size:
+            os.ftruncate(fd, self.offset)   # Torn tail from an interrupted writer
+
+    def _rotate(self) -> None:
+        """Move the full log aside and start a new one (lock held on the old one)."""
+        os.replace(self.path, rotated_path(self.path))
+        try:
+            index_path(self.path).unlink()
+        except FileNotFoundError:
+            pass
+        self._unlock()
+        self._open()
+        self._lock()
+        self._sync()
+
+    def _write(self, data: bytes) -> None:
+        self.file.write(LENGTH.pack(len(data)) + data)
+        self.offset += LENGTH.size + len(data)
+
+    def _intern(self, text: str) -> int:
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = self.next_id
+            self.next_id += 1
+            self.ids[text] = string_id
+            self._write(STRING_HEAD.pack(KIND_STRING, string_id) + text.encode("utf-8"))
+        return string_id
+
+    def append(self, command: str, project: str, timestamp: Optional[datetime] = None,
+               output_tokens: Optional[int] = None) -> None:
+        """Append one command entry."""
+        timestamp = timestamp or datetime.now()
+        ts = round(timestamp.timestamp() * 1_000_000)
+        self._lock()
+        try:
+            self._sync()
+            if self.max_bytes and self.offset >= self.max_bytes:
+                self._rotate()
+            project_id = self._intern(project)
+            command_id = self._intern(command)
+            if output_tokens is None:
+                record = ENTRY.pack(KIND_ENTRY, ts, project_id, command_id)
+            else:
+                record = OUTPUT_ENTRY.pack(KIND_OUTPUT_ENTRY, ts, project_id, command_id,
+                                           min(output_tokens, 0xFFFFFFFF))
+            self._write(record)
+        finally:
+            self._unlock()
+
+    def close(self) -> None:
+        """Persist the string index and close the log."""
+        if self.file is None:
+            return
+        try:
+            self._lock()
+            try:
+                self._sync()
+                self._save_index()
+            finally:
+                self._unlock()
+        except OSError:
+            pass   # The index is only a cache
+        finally:
+            self.file.close()
+            self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def json_to_binary(json_path: Path, binary_path: Path) -> int:
+    """Convert a memento-commands.json file into a fresh binary log.
+
+    Every entry is parsed before the old log is removed, so a malformed
+    entry raises ValueError and leaves the existing binary log untouched.
+    """
+    with open(json_path, "r") as f:
+        commands = json.load(f).get("commands", [])
+
+    records = []
+    for i, entry in enumerate(commands):
+        try:
+            records.append((
+                entry.get("command", ""),
+                entry.get("project", ""),
+                datetime.fromisoformat(entry["timestamp"]),
+                entry.get("output_tokens")
+            ))
+        except KeyError as e:
+            raise ValueError(f"{json_path}: entry {i} has no {e}") from None
+        except (AttributeError, TypeError, ValueError) as e:
+            raise ValueError(f"{json_path}: entry {i}: {e}") from None
+
+    for stale in (binary_path, rotated_path(binary_path), index_path(binary_path)):
+        if stale.exists():
+            stale.unlink()
+    with CommandLogWriter(binary_path, max_bytes=None) as writer:
+        for record in records:
+            writer.append(*record)
+    return len(records)
+
+
+def binary_to_json(binary_path: Path, json_path: Path, limit: Optional[int] = None) -> int:
+    """Convert a binary log (and its rotated predecessor) into memento-commands.json format."""
+    commands = [entry for path in log_files(binary_path) for entry in iter_entries(path)]
+    if limit:
+        commands = commands[-limit:]
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(json_path, "w") as f:
+        json.dump({"commands": commands, "version": "1.0"}, f, indent=2)
+    return len(commands)
+
+
+def benchmark(entries: int = 100000) -> dict:
+    """Compare size and scan throughput of the JSON and binary encodings."""
+    import random
+    import tempfile
+
+    rng = random.Random(42)
+    projects = [f"project-{i}" for i in range(8)]
+    commands = (
+        ["git status", "git diff", "npm test", "npm run build", "pytest -q", "ls -la"]
+        + [f"python3 scripts/task_{i}.py --verbose" for i in range(200)]
+    )
+    start_ts = datetime(2026, 1, 1).timestamp()
+    data = [
+        {
+            "command": rng.choice(commands),
+            "project": rng.choice(projects),
+            "timestamp": datetime.fromtimestamp(start_ts + i * 7.5).isoformat()
+        }
+        for i in range(entries)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "commands.json"
+        binary_path = Path(tmp) / "commands.bin"
+        with open(json_path, "w") as f:
+            json.dump({"commands": data, "version": "1.0"}, f, indent=2)
+        json_to_binary(json_path, binary_path)
+
+        t0 = time.perf_counter()
+        with open(json_path, "r") as f:
+            json_count = len(json.load(f)["commands"])
+        json_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        binary_count = sum(1 for r in iter_records(binary_path) if r[0] == "entry")
+        binary_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        decoded_count = sum(1 for _ in iter_entries(binary_path))
+        decoded_seconds = time.perf_counter() - t0
+
+        json_bytes = json_path.stat().st_size
+        binary_bytes = binary_path.stat().st_size
+
+    return {
+        "entries": entries,
+        "json": {
+            "bytes_per_entry": round(json_bytes / entries, 1),
+            "scan_entries_per_sec": int(json_count / max(json_seconds, 1e-9))
+        },
+        "binary": {
+            "bytes_per_entry": round(binary_bytes / entries, 1),
+            "scan_entries_per_sec": int(binary_count / max(binary_seconds, 1e-9)),
+            "decoded_entries_per_sec": int(decoded_count / max(decoded_seconds, 1e-9))
+        },
+        "size_ratio": round(json_bytes / max(binary_bytes, 1), 1)
+    }
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Binary Command Log"
+    )
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument(
+        "--to-binary",
+        action="store_true",
+        help="Convert the JSON command log into the binary format"
+    )
+    mode.add_argument(
+        "--to-json",
+        action="store_true",
+        help="Convert the binary command log back into JSON"
+    )
+    mode.add_argument(
+        "--benchmark",
+        type=int,
+        metavar="N",
+        help="Benchmark bytes/entry and scan throughput on N synthetic entries"
+    )
+    parser.add_argument(
+        "--json-file",
+        default=str(JSON_FILE),
+        help=f"JSON command log (default: {JSON_FILE})"
+    )
+    parser.add_argument(
+        "--binary-file",
+        default=str(BINARY_FILE),
+        help=f"Binary command log (default: {BINARY_FILE})"
+    )
+    parser.add_argument(
+        "--limit", "-n",
+        type=int,
+        default=None,
+        help="With --to-json, keep only the last N entries"
+    )
+
+    args = parser.parse_args()
+    if args.benchmark is not None and args.benchmark < 1:
+        parser.error("--benchmark needs at least 1 entry")
+
+    try:
+        if args.benchmark is not None:
+            results = benchmark(args.benchmark)
+        elif args.to_binary:
+            count = json_to_binary(Path(args.json_file), Path(args.binary_file))
+            results = {"status": "converted", "entries": count, "output": args.binary_file}
+        else:
+            count = binary_to_json(Path(args.binary_file), Path(args.json_file), args.limit)
+            results = {"status": "converted", "entries": count, "output": args.json_file}
+    except (OSError, json.JSONDecodeError, KeyError, ValueError, CommandLogError) as e:
+        results = {"status": "error", "error": str(e)}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Memento - Command Stats
+"Remember Sammy Jankis." — Recognise the habit, not every instance of it.
+
+Normalises Bash commands into families (`git commit -m "fix"` -> `git commit -m
+<str>`) and keeps per-project, per-day prefix tries of counts in
+~/.claude/memento-command-trie.json. The tries are updated incrementally by
+log-command.py, so queries cost O(distinct families) no matter how many
+commands were logged.
+"""
+
+import fcntl
+import heapq
+import json
+import os
+import re
+import shlex
+import sys
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+TRIE_FILE = Path.home() / ".claude" / "memento-command-trie.json"
+COMMANDS_FILE = Path.home() / ".claude" / "memento-commands.json"
+
+MAX_DAYS = 90   # Keep per-day tries for this many days
+MAX_DEPTH = 4   # Tokens kept per normalised command
+
+# Shell operators that separate commands in a line
+SEPARATORS = {"&&", "||", ";", "|", "&", "|&", ";;", "(", ")"}
+# Redirections; their target is dropped along with the operator
+REDIRECTS = {">", ">>", "<", "<<", "<<<", ">&", "&>", "&>>", ">|", "<&", "<>"}
+# Characters that form operator tokens; a newline ends a command like ';'
+OPERATOR_CHARS = "();<>|&\n"
+# A heredoc start: <<DELIM, <<-DELIM, <<'DELIM' or <<"DELIM" (not <<<)
+HEREDOC_RE = re.compile(r"(?<!<)<<(?!<)-?\s*(['\"]?)([\w.-]+)\1")
+
+NUMBER_RE = re.compile(r"^-?\d+(\.\d+)?$")
+HASH_RE = re.compile(r"^(?=.*\d)[0-9a-f]{7,64}$")
+URL_RE = re.compile(r"^[a-zA-Z][\w+.-]*://")
+ASSIGNMENT_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+EXTENSION_RE = re.compile(r"\.[A-Za-z0-9]{1,6}$")
+
+
+def normalize_arg(arg: str, quoted: bool = False) -> str:
+    """Replace a variable argument with a placeholder."""
+    if NUMBER_RE.match(arg):
+        return "<num>"
+    if arg.startswith("-"):
+        # Keep flag names, drop attached values: --output=x -> --output
+        return arg.split("=", 1)[0]
+    if HASH_RE.match(arg):
+        return "<hash>"
+    if URL_RE.match(arg):
+        return "<url>"
+    if quoted or any(c.isspace() for c in arg):
+        return "<str>"
+    if "/" in arg or arg.startswith((".", "~")) or EXTENSION_RE.search(arg):
+        return "<path>"
+    return arg
+
+
+def _quotes(text: str) -> int:
+    return text.count('"') + text.count("'")
+
+
+def strip_heredocs(command: str) -> str:
+    """Drop heredoc bodies, keeping the lines that start them.
+
+    An unterminated heredoc (e.g. a truncated command) runs to the end.
+    """
+    kept = []
+    pending = []   # Delimiters still to be closed, in order
+    for line in command.split("\n"):
+        if pending:
+            if line.strip() == pending[0]:
+                pending.pop(0)
+            continue
+        kept.append(line)
+        pending = [match.group(2) for match in HEREDOC_RE.finditer(line)]
+    return "\n".join(kept)
+
+
+def lex(command: str) -> list[tuple[str, bool, bool]]:
+    """Tokenize a shell line into (token, quoted, glued) triples.
+
+    shlex drops the quotes, so a token counts as quoted when the source text
+    it was read from has more quote characters than the token itself. glued
+    means no whitespace separates the token from the one before it.
+    """
+    try:
+        lexer = shlex.shlex(command, posix=True, punctuation_chars=OPERATOR_CHARS)
+        lexer.whitespace = " \t\r"
+        lexer.whitespace_split = True
+        tokens = []
+        start = 0
+        previous = ""
+        for token in lexer:
+            # Less the character shlex read ahead at a word/operator boundary
+            end = lexer.instream.tell() - len(getattr(lexer, "_pushback_chars", ()))
+            raw = command[start:end]
+            glued = not raw[:1].isspace() and not previous[-1:].isspace()
+            tokens.append((token, _quotes(raw) > _quotes(token), glued))
+            start, previous = end, raw
+        return tokens
+    except ValueError:
+        # Unbalanced quotes (often a truncated command): best effort
+        return [(word, _quotes(word) > 0, False) for word in command.split()]
+
+
+def split_command(command: str) -> list[list[tuple[str, bool]]]:
+    """Tokenize a shell line into simple commands of (token, quoted) pairs.
+
+    Heredoc bodies and redirections (with their targets and any file
+    descriptor number, as in 2>&1) are dropped; newlines separate commands.
+    """
+    command = strip_heredocs(command).replace("\\\n", "")   # And line continuations
+    segments = [[]]
+    skip_next = False
+    for token, quoted, glued in lex(command):
+        segment = segments[-1]
+        if skip_next:
+            skip_next = False
+        elif quoted:
+            segment.append((token, quoted))
+        elif token in REDIRECTS:
+            skip_next = True
+            if glued and segment and not segment[-1][1] and segment[-1][0].isdigit():
+                segment.pop()   # File descriptor: 2>&1, 2>/dev/null
+        elif token in SEPARATORS or (
+                "\n" in token and not token.strip(OPERATOR_CHARS)):
+            segments.append([])
+        else:
+            segment.append((token, quoted))
+    return [s for s in segments if s]
+
+
+def normalize(command: str) -> list[list[str]]:
+    """Normalise a command line into one token list per simple command."""
+    families = []
+    for segment in split_command(command):
+        # Leading environment assignments are not part of the family
+        while segment and ASSIGNMENT_RE.match(segment[0][0]):
+            segment = segment[1:]
+        if not segment:
+            continue
+
+        name = segment[0][0]
+        tokens = [name.rsplit("/", 1)[-1] or name]
+        for arg, quoted in segment[1:]:
+            token = normalize_arg(arg, quoted)
+            if token.startswith("<") and tokens[-1] == token:
+                continue  # Collapse runs of the same placeholder
+            tokens.append(token)
+            if len(tokens) >= MAX_DEPTH:
+                break
+        families.append(tokens)
+    return families
+
+
+def new_node() -> dict:
+    """Trie node: n = commands through here, e = commands ending here."""
+    return {"n": 0, "e": 0, "c": {}}
+
+
+def insert(trie: dict, tokens: list[str], ts: int, output_tokens: int = 0) -> None:
+    """Count one normalised command in a trie.
+
+    Nodes also sum the output tokens of the commands through them ("o"), and
+    of the commands ending at them ("eo").
+    """
+    node = trie
+    node["n"] += 1
+    if output_tokens:
+        node["o"] = node.get("o", 0) + output_tokens
+    for token in tokens:
+        node = node["c"].setdefault(token, new_node())
+        node["n"] += 1
+        node["t"] = max(node.get("t", 0), ts)
+        if output_tokens:
+            node["o"] = node.get("o", 0) + output_tokens
+    node["e"] += 1
+    if output_tokens:
+        node["eo"] = node.get("eo", 0) + output_tokens
+
+
+def lock_tries():
+    """Open the trie lock file and hold an exclusive lock on it.
+
+    The trie file itself is replaced on every save, so writers lock a
+    sidecar file instead. Close the returned file to release the lock.
+    """
+    lock_path = TRIE_FILE.with_name(TRIE_FILE.name + ".lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    lock = open(lock_path, "a")
+    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+    return lock
+
+
+def load_tries() -> dict:
+    """Load existing tries or create new structure."""
+    if TRIE_FILE.exists():
+        try:
+            with open(TRIE_FILE, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {"days": {}, "version": "1.0"}
+
+
+def save_tries(data: dict) -> None:
+    """Save tries compactly via a temporary file and rename, so readers
+    never see a partial file."""
+    TRIE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = TRIE_FILE.with_name(f".{TRIE_FILE.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, TRIE_FILE)
+
+
+def add_command(data: dict, command: str, project: str,
+                timestamp: Optional[datetime] = None,
+                output_tokens: Optional[int] = None) -> None:
+    """Add one command to the in-memory tries, dropping expired days.
+
+    Output tokens are attributed to the last command of a chain, which is
+    the one whose output reaches the context.
+    """
+    timestamp = timestamp or datetime.now()
+    day = timestamp.date().isoformat()
+    ts = int(timestamp.timestamp())
+
+    days = data.setdefault("days", {})
+    trie = days.setdefault(day, {}).setdefault(project, new_node())
+    families = normalize(command)
+    for i, tokens in enumerate(families):
+        last = i == len(families) - 1
+        insert(trie, tokens, ts, (output_tokens or 0) if last else 0)
+
+    if len(days) > MAX_DAYS:
+        for old in sorted(days)[:-MAX_DAYS]:
+            del days[old]
+
+
+def record(command: str, project: str, timestamp: Optional[datetime] = None,
+           output_tokens: Optional[int] = None) -> None:
+    """Count a logged command and persist the tries.
+
+    The read-modify-write runs under the trie lock, so concurrent hooks
+    never drop each other's counts.
+    """
+    with lock_tries():
+        data = load_tries()
+        add_command(data, command, project, timestamp, output_tokens)
+        save_tries(data)
+
+
+def _add(families: dict, key: tuple, count: int, output_tokens: int, ts: int) -> None:
+    stats = families.get(key)
+    if stats is None:
+        families[key] = [count, output_tokens, ts]
+    else:
+        stats[0] += count
+        stats[1] += output_tokens
+        stats[2] = max(stats[2], ts)
+
+
+def collect_families(trie: dict, depth: int, families: dict) -> None:
+    """Accumulate [count, output tokens, last used] per family, cut at depth tokens."""
+    stack = [((), trie)]
+    while stack:
+        prefix, node = stack.pop()
+        for token, child in node["c"].items():
+            key = prefix + (token,)
+            if len(key) >= depth:
+                _add(families, key, child["n"], child.get("o", 0), child.get("t", 0))
+            else:
+                if child["e"]:
+                    _add(families, key, child["e"], child.get("eo", 0), child.get("t", 0))
+                stack.append((key, child))
+
+
+SORT_KEYS = {"count": 0, "output_tokens": 1}
+
+
+def query(data: dict, days: int = 7, top: int = 20, depth: int = 2,
+          project: Optional[str] = None, today: Optional[date] = None,
+          sort: str = "count") -> dict:
+    """Top command families and daily activity over the last N days.
+
+    sort="output_tokens" ranks families by the context their output consumed.
+    """
+    today = today or date.today()
+    since = (today - timedelta(days=days - 1)).isoformat()
+
+    families = {}
+    per_project = {}
+    activity = {}
+
+    for day, projects in data.get("days", {}).items():
+        if day < since:
+            continue
+        for name, trie in projects.items():
+            if project and name != project:
+                continue
+            collect_families(trie, depth, per_project.setdefault(name, {}))
+            activity[day] = activity.get(day, 0) + trie["n"]
+
+    for project_families in per_project.values():
+        for key, (count, output_tokens, ts) in project_families.items():
+            _add(families, key, count, output_tokens, ts)
+
+    index = SORT_KEYS[sort]
+    ranked = heapq.nlargest(top, families.items(), key=lambda item: item[1][index])
+
+    projects = {}
+    for name, project_families in per_project.items():
+        projects[name] = {
+            "commands": sum(stats[0] for stats in project_families.values()),
+            "output_tokens": sum(stats[1] for stats in project_families.values()),
+            "top": [" ".join(key) for key, _ in heapq.nlargest(
+                3, project_families.items(), key=lambda item: item[1][index])]
+        }
+
+    return {
+        "days": days,
+        "since": since,
+        "depth": depth,
+        "sort": sort,
+        "total_commands": sum(activity.values()),
+        "families": [
+            {
+                "family": " ".join(key),
+                "count": count,
+                "output_tokens": output_tokens,
+                "avg_output_tokens": round(output_tokens / count) if count else 0,
+                "last_used": datetime.fromtimestamp(ts).isoformat() if ts else None
+            }
+            for key, (count, output_tokens, ts) in ranked
+        ],
+        "projects": projects,
+        "activity": dict(sorted(activity.items()))
+    }
+
+
+def rebuild(commands_file: Path = COMMANDS_FILE) -> int:
+    """Rebuild the tries from the JSON command log."""
+    with open(commands_file, 'r') as f:
+        commands = json.load(f).get("commands", [])
+
+    data = {"days": {}, "version": "1.0"}
+    for entry in commands:
+        add_command(
+            data,
+            entry.get("command", ""),
+            entry.get("project", ""),
+            datetime.fromisoformat(entry["timestamp"]),
+            entry.get("output_tokens")
+        )
+    with lock_tries():
+        save_tries(data)
+    return len(commands)
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Command Stats"
+    )
+    parser.add_argument(
+        "--days", "-d",
+        type=int,
+        default=7,
+        help="Look back this many days (default: 7)"
+    )
+    parser.add_argument(
+        "--top", "-n",
+        type=int,
+        default=20,
+        help="Number of command families to show (default: 20)"
+    )
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=2,
+        help=f"Tokens per command family, up to {MAX_DEPTH} (default: 2)"
+    )
+    parser.add_argument(
+        "--project", "-p",
+        default=None,
+        help="Filter to a specific project"
+    )
+    parser.add_argument(
+        "--sort", "-s",
+        default="count",
+        choices=sorted(SORT_KEYS),
+        help="Rank families by run count or by output tokens (default: count)"
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Rebuild the tries from memento-commands.json first"
+    )
+
+    args = parser.parse_args()
+
+    if args.rebuild:
+        try:
+            rebuild()
+        except (OSError, json.JSONDecodeError, KeyError, ValueError) as e:
+            print(json.dumps({"status": "error", "error": str(e)}))
+            sys.exit(1)
+
+    t0 = time.perf_counter()
+    results = query(
+        load_tries(),
+        days=args.days,
+        top=args.top,
+        depth=max(1, min(args.depth, MAX_DEPTH)),
+        project=args.project,
+        sort=args.sort
+    )
+    results["query_ms"] = round((time.perf_counter() - t0) * 1000, 2)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
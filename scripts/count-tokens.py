@@ -5,32 +5,313 @@ Memento - Token Counter
 
 Analyzes Claude Code project context and estimates token usage.
 Uses tiktoken with cl100k_base encoding (similar to Claude's tokenization).
+Run with --warm once (install.sh does) to load the encoder offline and fast.
 """
 
+import heapq
 import json
+import marshal
 import sys
 import os
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
-try:
-    import tiktoken
-    TIKTOKEN_AVAILABLE = True
-except ImportError:
-    TIKTOKEN_AVAILABLE = False
+from importlib.util import find_spec
+
+# tiktoken is imported on first use, so hooks that only estimate never pay for it
+TIKTOKEN_AVAILABLE = find_spec("tiktoken") is not None
+tiktoken = None
+
+
+def _tiktoken():
+    global tiktoken
+    if tiktoken is None:
+        import tiktoken as module
+        tiktoken = module
+    return tiktoken
+
+
+ENCODING_NAME = "cl100k_base"
+ENCODING_URL = "https://openaipublic.blob.core.windows.net/encodings/cl100k_base.tiktoken"
+
+# Vendored BPE file (tiktoken's download cache) and the prepared encoder
+# parameters written by --warm
+WARM_CACHE_DIR = Path.home() / ".claude" / "memento-tiktoken"
+WARM_CACHE_FILE = WARM_CACHE_DIR / f"{ENCODING_NAME}.marshal"
+WARM_CACHE_FORMAT = 1
+
+_encoder = None
+
+
+def warm_cache_header() -> dict:
+    """Identifies what a warm cache file was built for; any mismatch means a rebuild."""
+    return {
+        "format": WARM_CACHE_FORMAT,
+        "encoding": ENCODING_NAME,
+        "tiktoken": getattr(_tiktoken(), "__version__", None),
+        "python": list(sys.version_info[:2]),
+    }
+
+
+def load_warm_encoder():
+    """Build the encoder from the warm cache, or None if it is missing or stale."""
+    try:
+        with open(WARM_CACHE_FILE, 'rb') as f:
+            header, params = marshal.load(f)
+        if header != warm_cache_header():
+            return None
+        return _tiktoken().Encoding(**params)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+
+
+def get_encoder():
+    """The cl100k_base encoder, created once per process.
+
+    Prefers the warm cache; otherwise tiktoken loads the BPE file, from the
+    vendored copy when there is one.
+    """
+    global _encoder
+    if _encoder is None:
+        _encoder = load_warm_encoder()
+        if _encoder is None:
+            if WARM_CACHE_DIR.is_dir():
+                os.environ.setdefault("TIKTOKEN_CACHE_DIR", str(WARM_CACHE_DIR))
+            _encoder = _tiktoken().get_encoding(ENCODING_NAME)
+    return _encoder
+
+
+def warm(bpe_file: Optional[str] = None) -> dict:
+    """Vendor the BPE file and write the prepared encoder parameters.
+
+    bpe_file is a local copy of cl100k_base.tiktoken for hosts without
+    network access; it is placed where tiktoken's cache looks for the
+    download, keyed by the SHA-1 of its URL.
+    """
+    global _encoder
+    if not TIKTOKEN_AVAILABLE:
+        return {"status": "error", "error": "tiktoken is not installed"}
+
+    import hashlib
+    import shutil
+    from tiktoken_ext import openai_public
+
+    WARM_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    os.environ["TIKTOKEN_CACHE_DIR"] = str(WARM_CACHE_DIR)
+    if bpe_file:
+        cache_key = hashlib.sha1(ENCODING_URL.encode()).hexdigest()
+        shutil.copyfile(Path(bpe_file).expanduser(), WARM_CACHE_DIR / cache_key)
+
+    try:
+        params = openai_public.cl100k_base()
+    except Exception as e:
+        return {"status": "error", "error": f"could not load {ENCODING_NAME}: {e}"}
+
+    tmp = WARM_CACHE_FILE.with_suffix(".tmp")
+    with open(tmp, 'wb') as f:
+        marshal.dump((warm_cache_header(), params), f)
+    os.replace(tmp, WARM_CACHE_FILE)
+
+    t0 = time.perf_counter()
+    _encoder = load_warm_encoder()
+    load_ms = (time.perf_counter() - t0) * 1000
+    if _encoder is None:
+        return {"status": "error", "error": "warm cache could not be read back"}
+
+    return {
+        "status": "ok",
+        "encoding": ENCODING_NAME,
+        "cache_file": str(WARM_CACHE_FILE),
+        "bytes": WARM_CACHE_FILE.stat().st_size,
+        "load_ms": round(load_ms, 1)
+    }
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough estimation: ~4 characters per token for code."""
+    return len(text) // 4
 
 
 def count_tokens(text: str) -> int:
     """Count tokens using tiktoken or fallback to estimation."""
     if TIKTOKEN_AVAILABLE:
-        enc = tiktoken.get_encoding("cl100k_base")
-        return len(enc.encode(text))
+        return len(get_encoder().encode(text))
     else:
-        # Rough estimation: ~4 characters per token for code
-        return len(text) // 4
+        return estimate_tokens(text)
+
+
+def hook_counter() -> Callable[[str], int]:
+    """count_tokens when the warm encoder loads, else estimate_tokens.
+
+    For hooks that run on every tool call: from the warm cache the encoder
+    is cheap to build, otherwise loading it costs more than the count is
+    worth and the ~4 chars/token estimate is used instead.
+    """
+    global _encoder
+    if _encoder is None and TIKTOKEN_AVAILABLE and WARM_CACHE_FILE.exists():
+        _encoder = load_warm_encoder()
+    return count_tokens if _encoder is not None else estimate_tokens
+
+
+# Streams longer than this many characters are estimated from samples
+SAMPLE_THRESHOLD = 64 * 1024
+SAMPLE_SIZE = 2048   # Characters per sample
+MAX_SAMPLES = 32     # Upper bound on retained samples
+
+
+class TokenStream:
+    """Bounded-memory token counter for large streamed text (e.g. tool output).
+
+    The first SAMPLE_THRESHOLD characters are counted exactly. Beyond that,
+    evenly spaced samples are tokenized and scaled by the number of characters
+    seen; the sample spacing doubles whenever MAX_SAMPLES is exceeded, so
+    memory stays constant however long the stream is. counter replaces
+    count_tokens, e.g. with estimate_tokens where loading tiktoken would
+    cost more than the count is worth.
+    """
+
+    def __init__(self, threshold: int = SAMPLE_THRESHOLD,
+                 counter: Optional[Callable[[str], int]] = None):
+        self.threshold = threshold
+        self.counter = counter or count_tokens
+        self.head = []
+        self.head_chars = 0
+        self.total_chars = 0
+        self.samples = []          # [(position, text)]
+        self.partial = None        # (position, [parts], chars) of a sample still being filled
+        self.window = SAMPLE_SIZE * 4
+        self.next_sample = threshold
+
+    def _add_sample(self, position: int, text: str, pos: int) -> None:
+        self.samples.append((position, text))
+        if len(self.samples) > MAX_SAMPLES:
+            self.samples = self.samples[::2]
+            self.window *= 2
+            self.next_sample = max(self.samples[-1][0] + self.window, pos)
+
+    def feed(self, chunk: str) -> None:
+        """Add the next chunk of text.
+
+        Samples are assembled across chunk boundaries, so the estimate does
+        not depend on how the stream is split.
+        """
+        pos = self.total_chars
+        self.total_chars += len(chunk)
+
+        if self.head_chars < self.threshold:
+            part = chunk[:self.threshold - self.head_chars]
+            self.head.append(part)
+            self.head_chars += len(part)
+
+        if self.partial is not None:
+            position, parts, chars = self.partial
+            part = chunk[:SAMPLE_SIZE - chars]
+            parts.append(part)
+            chars += len(part)
+            if chars < SAMPLE_SIZE:
+                self.partial = (position, parts, chars)
+                return
+            self.partial = None
+            self._add_sample(position, "".join(parts), pos)
+
+        while self.next_sample < self.total_chars:
+            position = self.next_sample
+            offset = position - pos
+            self.next_sample += self.window
+            text = chunk[offset:offset + SAMPLE_SIZE]
+            if len(text) < SAMPLE_SIZE:
+                # Runs past this chunk; the window is wider than a sample,
+                # so no other sample starts before it completes
+                self.partial = (position, [text], len(text))
+                break
+            self._add_sample(position, text, pos)
+
+    @property
+    def sampled(self) -> bool:
+        """True when the count is extrapolated from samples."""
+        return self.total_chars > self.threshold
+
+    def count(self) -> int:
+        """Exact or estimated token count of everything fed so far."""
+        tokens = self.counter("".join(self.head))
+        if not self.sampled:
+            return tokens
+
+        texts = [text for _, text in self.samples]
+        if self.partial is not None:
+            texts.append("".join(self.partial[1]))
+        sample_chars = sum(len(text) for text in texts)
+        tail_chars = self.total_chars - self.head_chars
+        if not sample_chars:
+            return tokens + tail_chars // 4
+        sample_tokens = sum(self.counter(text) for text in texts)
+        return tokens + round(sample_tokens * tail_chars / sample_chars)
 
 
-def analyze_file(filepath: str) -> dict:
+def count_tokens_bounded(text: str, threshold: int = SAMPLE_THRESHOLD) -> tuple[int, bool]:
+    """Count tokens in time bounded by threshold; returns (tokens, estimated)."""
+    stream = TokenStream(threshold)
+    stream.feed(text)
+    return stream.count(), stream.sampled or not TIKTOKEN_AVAILABLE
+
+
+# CLI defaults for the resource guard, so no command reads a multi-GB file
+# in full; 0 disables a limit
+DEFAULT_MAX_FILE_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_TOTAL_BYTES = 256 * 1024 * 1024
+DEFAULT_DEADLINE_SECONDS = 30.0
+
+
+class ResourceGuard:
+    """Per-file size, total byte and wall-clock limits for an analysis.
+
+    Files that would break a limit are not read; their tokens are estimated
+    from stat() size instead, and the guard remembers which limits tripped so
+    results can be marked as truncated.
+    """
+
+    def __init__(self, max_file_bytes: Optional[int] = None,
+                 max_total_bytes: Optional[int] = None,
+                 deadline_seconds: Optional[float] = None):
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.bytes_read = 0
+        self.tripped = set()
+
+    def expired(self) -> bool:
+        """True once the deadline has passed."""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            self.tripped.add("deadline")
+            return True
+        return False
+
+    def check(self, size: int) -> Optional[str]:
+        """Name of the limit that reading size more bytes would break, if any."""
+        reason = None
+        if self.max_file_bytes is not None and size > self.max_file_bytes:
+            reason = "max_file_bytes"
+        elif self.max_total_bytes is not None and self.bytes_read + size > self.max_total_bytes:
+            reason = "max_total_bytes"
+        elif self.expired():
+            reason = "deadline"
+        if reason:
+            self.tripped.add(reason)
+        return reason
+
+    def consume(self, size: int) -> None:
+        self.bytes_read += size
+
+    def mark(self, results: dict) -> dict:
+        """Flag results as truncated when any limit tripped."""
+        results["truncated"] = bool(self.tripped)
+        if self.tripped:
+            results["guards_tripped"] = sorted(self.tripped)
+        return results
+
+
+def analyze_file(filepath: str, guard: Optional[ResourceGuard] = None) -> dict:
     """Analyze a single file for token usage."""
     path = Path(filepath).expanduser()
     
@@ -40,6 +321,29 @@ def analyze_file(filepath: str) -> dict:
             "exists": False,
             "error": "File not found"
         }
+
+    if guard is not None:
+        try:
+            size = path.stat().st_size
+        except OSError as e:
+            return {
+                "file": filepath,
+                "exists": True,
+                "error": str(e)
+            }
+        reason = guard.check(size)
+        if reason:
+            # Fast estimate from size alone (~4 bytes per token)
+            return {
+                "file": filepath,
+                "exists": True,
+                "tokens": size // 4,
+                "bytes": size,
+                "estimated": True,
+                "truncated": True,
+                "guard": reason
+            }
+        guard.consume(size)
     
     try:
         content = path.read_text(encoding='utf-8')
@@ -70,15 +374,67 @@ def analyze_file(filepath: str) -> dict:
     }
 
 
-def find_claude_configs(root: Path) -> dict:
-    """Find all Claude Code configuration files in project."""
+def find_skills(skills_dir: Path, found: list[str],
+                guard: Optional[ResourceGuard] = None) -> int:
+    """Collect SKILL.md files under skills_dir into found.
+
+    With a guard, the deadline is checked at every directory entry. When it
+    passes, the walk stops; directories left unvisited still contribute their
+    own SKILL.md if it exists (a single stat each, so it is estimated from
+    size), and their count is returned.
+    """
+    stack = [str(skills_dir)]
+    pending = []
+    seen = set()
+    while stack:
+        if guard is not None and guard.expired():
+            pending.extend(stack)
+            break
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if guard is not None and guard.expired():
+                        pending.append(current)
+                        break
+                    try:
+                        if entry.is_dir():
+                            stat = entry.stat()
+                            if (stat.st_dev, stat.st_ino) not in seen:   # Symlink loops
+                                seen.add((stat.st_dev, stat.st_ino))
+                                stack.append(entry.path)
+                        elif entry.name == "SKILL.md":
+                            found.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        if pending:
+            pending.extend(stack)
+            break
+
+    known = set(found)
+    for directory in pending:
+        candidate = os.path.join(directory, "SKILL.md")
+        if candidate not in known and os.path.isfile(candidate):
+            found.append(candidate)
+    return len(pending)
+
+
+def find_claude_configs(root: Path, guard: Optional[ResourceGuard] = None) -> dict:
+    """Find all Claude Code configuration files in project.
+
+    With a guard, the recursive skills search stops at the deadline and
+    "skills_unvisited_dirs" counts the directories it did not walk.
+    """
     configs = {
         "claude_md": [],
         "skills": [],
         "commands": [],
         "agents": [],
         "hooks": [],
-        "mcp_config": None
+        "mcp_config": None,
+        "skills_unvisited_dirs": 0
     }
     
     # Project-level CLAUDE.md
@@ -100,9 +456,8 @@ def find_claude_configs(root: Path) -> dict:
         Path.home() / ".claude" / "skills"
     ]
     for skills_dir in skills_dirs:
-        if skills_dir.exists():
-            for skill_md in skills_dir.rglob("SKILL.md"):
-                configs["skills"].append(str(skill_md))
+        if skills_dir.is_dir():
+            configs["skills_unvisited_dirs"] += find_skills(skills_dir, configs["skills"], guard)
     
     # Commands
     commands_dirs = [
@@ -147,10 +502,15 @@ def find_claude_configs(root: Path) -> dict:
     return configs
 
 
-def analyze_project(root_path: str = ".", system_estimate: Optional[int] = None) -> dict:
-    """Full project context analysis."""
+def analyze_project(root_path: str = ".", system_estimate: Optional[int] = None,
+                    guard: Optional[ResourceGuard] = None) -> dict:
+    """Full project context analysis.
+
+    With a guard, files past its limits are estimated from their size and the
+    results are marked "truncated".
+    """
     root = Path(root_path).resolve()
-    configs = find_claude_configs(root)
+    configs = find_claude_configs(root, guard)
 
     # System prompt varies by enabled features:
     # Base: ~8k | +Web search: 1.5k | +MCP servers: 0.5-2k each
@@ -186,37 +546,37 @@ def analyze_project(root_path: str = ".", system_estimate: Optional[int] = None)
     
     # Analyze each component type
     for claude_md in configs["claude_md"]:
-        analysis = analyze_file(claude_md)
+        analysis = analyze_file(claude_md, guard)
         results["components"]["claude_md"].append(analysis)
         if "tokens" in analysis:
             results["totals"]["claude_md_tokens"] += analysis["tokens"]
     
     for skill in configs["skills"]:
-        analysis = analyze_file(skill)
+        analysis = analyze_file(skill, guard)
         results["components"]["skills"].append(analysis)
         if "tokens" in analysis:
             results["totals"]["skills_tokens"] += analysis["tokens"]
     
     for cmd in configs["commands"]:
-        analysis = analyze_file(cmd)
+        analysis = analyze_file(cmd, guard)
         results["components"]["commands"].append(analysis)
         if "tokens" in analysis:
             results["totals"]["commands_tokens"] += analysis["tokens"]
     
     for agent in configs["agents"]:
-        analysis = analyze_file(agent)
+        analysis = analyze_file(agent, guard)
         results["components"]["agents"].append(analysis)
         if "tokens" in analysis:
             results["totals"]["agents_tokens"] += analysis["tokens"]
     
     for hooks in configs["hooks"]:
-        analysis = analyze_file(hooks)
+        analysis = analyze_file(hooks, guard)
         results["components"]["hooks"].append(analysis)
         if "tokens" in analysis:
             results["totals"]["hooks_tokens"] += analysis["tokens"]
     
     if configs["mcp_config"]:
-        analysis = analyze_file(configs["mcp_config"])
+        analysis = analyze_file(configs["mcp_config"], guard)
         results["components"]["mcp"] = analysis
         if "tokens" in analysis:
             results["totals"]["mcp_tokens"] = analysis["tokens"]
@@ -235,31 +595,317 @@ def analyze_project(root_path: str = ".", system_estimate: Optional[int] = None)
         results["estimates"]["system_prompt_tokens"] +
         results["totals"]["total_project_tokens"]
     )
+
+    if guard is not None:
+        guard.mark(results)
+        if configs["skills_unvisited_dirs"]:
+            results["skills_unvisited_dirs"] = configs["skills_unvisited_dirs"]
     
     return results
 
 
-def analyze_files(filepaths: list[str]) -> dict:
-    """Analyze multiple specific files."""
+def analyze_files(filepaths: list[str], guard: Optional[ResourceGuard] = None,
+                  on_file: Optional[Callable[[dict], None]] = None) -> dict:
+    """Analyze multiple specific files, within the guard's limits if given.
+
+    If on_file is given, each analysis is handed to it as soon as it is made
+    instead of being kept in results["files"], so memory stays flat however
+    many files are passed.
+    """
     results = {
         "files": [],
         "total_tokens": 0,
         "total_lines": 0,
         "tiktoken_available": TIKTOKEN_AVAILABLE
     }
+    if on_file is not None:
+        del results["files"]
     
     for filepath in filepaths:
-        analysis = analyze_file(filepath)
-        results["files"].append(analysis)
+        analysis = analyze_file(filepath, guard)
+        if on_file is not None:
+            on_file(analysis)
+        else:
+            results["files"].append(analysis)
         if "tokens" in analysis:
             results["total_tokens"] += analysis["tokens"]
         if "lines" in analysis:
             results["total_lines"] += analysis["lines"]
+
+    if guard is not None:
+        guard.mark(results)
     
     return results
 
 
-def main():
+# Project-relative locations of config files, mirroring find_claude_configs()
+COMPONENT_PATTERNS = [
+    ("claude_md", ("CLAUDE.md", ".claude/CLAUDE.md")),
+    ("hooks", (".claude/hooks.json",)),
+    ("mcp", (".mcp.json", ".claude/.mcp.json")),
+]
+
+
+def classify_component(relpath: str) -> Optional[str]:
+    """Map a project-relative path to its component type, or None."""
+    relpath = relpath.replace(os.sep, "/")
+    for component, paths in COMPONENT_PATTERNS:
+        if relpath in paths:
+            return component
+
+    parts = relpath.split("/")
+    if len(parts) >= 3 and parts[0] == ".claude":
+        if parts[1] == "skills" and parts[-1] == "SKILL.md":
+            return "skills"
+        if parts[1] in ("commands", "agents") and len(parts) == 3 and parts[2].endswith(".md"):
+            return parts[1]
+    return None
+
+
+def git_changed_files(root: Path, rev: str) -> list[str]:
+    """List files changed between rev and the working tree, relative to root.
+
+    Paths are NUL-separated (-z) so git does not quote non-ASCII names, and
+    a rename is listed as its old path deleted plus its new path added. Only
+    config locations are asked for, so git never lists or walks the rest of
+    a large repository.
+    """
+    import subprocess
+
+    config_paths = ("--", *sorted({path.split("/")[0] for _, paths in COMPONENT_PATTERNS
+                                   for path in paths}))
+
+    def git_paths(*args: str) -> set[str]:
+        output = subprocess.run(
+            ["git", "-C", str(root), *args],
+            capture_output=True, encoding="utf-8", errors="surrogateescape", check=True
+        ).stdout
+        return {path for path in output.split("\0") if path}
+
+    changed = git_paths("diff", "-z", "--name-only", "--no-renames", "--relative", rev, *config_paths)
+    untracked = git_paths("ls-files", "-z", "--others", "--exclude-standard", *config_paths)
+    return sorted(changed | untracked)
+
+
+def git_read_blobs(root: Path, rev: str, relpaths: list[str]) -> dict:
+    """Read old file versions at rev through a single `git cat-file --batch`.
+
+    Returns {relpath: text or None}; None means the file did not exist at rev
+    or is not valid UTF-8.
+    """
+    import subprocess
+
+    blobs = {}
+    if not relpaths:
+        return blobs
+
+    proc = subprocess.Popen(
+        ["git", "-C", str(root), "cat-file", "--batch"],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE
+    )
+    try:
+        for relpath in relpaths:
+            proc.stdin.write(f"{rev}:./{relpath}\n".encode("utf-8", "surrogateescape"))
+            proc.stdin.flush()
+
+            header = proc.stdout.readline().decode("utf-8").split()
+            if len(header) != 3 or header[1] != "blob":
+                blobs[relpath] = None
+                continue
+
+            data = proc.stdout.read(int(header[2]))
+            proc.stdout.read(1)  # Trailing newline after each object
+            try:
+                blobs[relpath] = data.decode("utf-8")
+            except UnicodeDecodeError:
+                blobs[relpath] = None
+    finally:
+        proc.stdin.close()
+        proc.stdout.close()
+        proc.wait()
+
+    return blobs
+
+
+def analyze_diff(root_path: str, rev: str) -> dict:
+    """Token delta of project config files between rev and the working tree.
+
+    Only files reported as changed by git are read and tokenized, so the cost
+    is independent of how many unchanged files the project has. Deltas use the
+    same keys as analyze_project()["totals"].
+    """
+    root = Path(root_path).resolve()
+
+    results = {
+        "project_root": str(root),
+        "rev": rev,
+        "tiktoken_available": TIKTOKEN_AVAILABLE,
+        "files": [],
+        "deltas": {
+            "claude_md_tokens": 0,
+            "skills_tokens": 0,
+            "commands_tokens": 0,
+            "agents_tokens": 0,
+            "hooks_tokens": 0,
+            "mcp_tokens": 0,
+            "total_project_tokens": 0
+        }
+    }
+
+    import subprocess
+    inside = subprocess.run(
+        ["git", "-C", str(root), "rev-parse", "--is-inside-work-tree"],
+        capture_output=True, text=True
+    )
+    if inside.returncode != 0 or inside.stdout.strip() != "true":
+        results["error"] = f"not a git work tree: {root}"
+        return results
+
+    try:
+        changed = git_changed_files(root, rev)
+    except Exception as e:
+        results["error"] = f"git diff failed: {getattr(e, 'stderr', None) or e}".strip()
+        return results
+
+    tracked = [(p, classify_component(p)) for p in changed]
+    tracked = [(p, c) for p, c in tracked if c is not None]
+    old_blobs = git_read_blobs(root, rev, [p for p, _ in tracked])
+
+    for relpath, component in tracked:
+        old_text = old_blobs.get(relpath)
+        new_path = root / relpath
+        new_text = None
+        if new_path.is_file():
+            try:
+                new_text = new_path.read_text(encoding='utf-8')
+            except (UnicodeDecodeError, OSError):
+                new_text = None
+
+        if old_text is None and new_text is None:
+            continue
+
+        old_tokens = count_tokens(old_text) if old_text is not None else 0
+        new_tokens = count_tokens(new_text) if new_text is not None else 0
+
+        if old_text is None:
+            status = "added"
+        elif new_text is None:
+            status = "deleted"
+        else:
+            status = "modified"
+
+        delta = new_tokens - old_tokens
+        results["files"].append({
+            "file": relpath,
+            "component": component,
+            "status": status,
+            "old_tokens": old_tokens,
+            "new_tokens": new_tokens,
+            "delta": delta
+        })
+        results["deltas"][f"{component}_tokens"] += delta
+        results["deltas"]["total_project_tokens"] += delta
+
+    return results
+
+
+class LargestFiles:
+    """Keep the n largest file analyses seen so far in a bounded min-heap.
+
+    Size is tokens, or the absolute delta for --diff entries. On ties the
+    file seen first wins.
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.heap = []
+        self.seen = 0
+
+    def add(self, analysis: dict) -> None:
+        item = (entry_size(analysis), -self.seen, analysis)
+        self.seen += 1
+        if len(self.heap) < self.n:
+            heapq.heappush(self.heap, item)
+        elif item[:2] > self.heap[0][:2]:
+            heapq.heapreplace(self.heap, item)
+
+    def items(self) -> list[dict]:
+        """The kept analyses, largest first."""
+        return [item[2] for item in sorted(self.heap, key=lambda item: item[:2], reverse=True)]
+
+
+def entry_size(analysis: dict) -> int:
+    """Ranking size of a per-file entry."""
+    if "delta" in analysis:
+        return abs(analysis["delta"])
+    return analysis.get("tokens", 0)
+
+
+def pop_file_entries(results: dict) -> list[dict]:
+    """Remove and return the per-file entries of any results dict.
+
+    Project components are flattened, each entry labelled with its component.
+    """
+    if "components" not in results:
+        return results.pop("files", [])
+
+    entries = []
+    for component, value in results.pop("components").items():
+        for analysis in value if isinstance(value, list) else [value] if value else []:
+            entries.append({"component": component, **analysis})
+    return entries
+
+
+def project_fields(value, fields: list[str]):
+    """Keep only the given dotted field paths, e.g. ["totals", "estimates.baseline_total"].
+
+    Paths continue through lists, so "files.tokens" keeps the tokens of every file.
+    """
+    tree = {}
+    for field in fields:
+        node = tree
+        for key in field.split("."):
+            node = node.setdefault(key, {})
+    return _project(value, tree)
+
+
+def _project(value, tree: dict):
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [_project(item, tree) for item in value]
+    if isinstance(value, dict):
+        return {key: _project(value[key], sub) for key, sub in tree.items() if key in value}
+    return value
+
+
+_siblings = {}
+
+
+def load_sibling(filename: str, module_name: str):
+    """Load a hyphenated sibling script as a module, once per process.
+
+    The one loader for all scripts: the others load count-tokens.py itself
+    inline and reach their other siblings through this function.
+    """
+    from importlib.util import spec_from_loader, module_from_spec
+    from importlib.machinery import SourceFileLoader
+
+    if module_name not in _siblings:
+        path = Path(__file__).parent / filename
+        spec = spec_from_loader(module_name, SourceFileLoader(module_name, str(path)))
+        module = module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _siblings[module_name] = module
+    return _siblings[module_name]
+
+
+def read_payload_fields(fields: dict) -> dict:
+    """Read selected fields of a hook event from stdin (see hook-payload.py)."""
+    return load_sibling("hook-payload.py", "hook_payload").read_hook_payload(fields)["fields"]
+
+
+def main(argv: Optional[list[str]] = None):
     """CLI entry point."""
     import argparse
     
@@ -273,8 +919,13 @@ def main():
     )
     parser.add_argument(
         "--project", "-p",
-        default=".",
-        help="Project root directory (default: current directory)"
+        default=None,
+        help="Project root directory (default: payload cwd with --stdin, else current directory)"
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read a hook event JSON from stdin and use its cwd as the project root"
     )
     parser.add_argument(
         "--json", "-j",
@@ -293,20 +944,135 @@ def main():
         default=None,
         help="Override system prompt token estimate (default: 10000)"
     )
+    parser.add_argument(
+        "--max-file-bytes",
+        type=int,
+        default=DEFAULT_MAX_FILE_BYTES,
+        help="Estimate files larger than this from their size instead of reading them "
+             f"(default: {DEFAULT_MAX_FILE_BYTES}; 0 for no limit)"
+    )
+    parser.add_argument(
+        "--max-total-bytes",
+        type=int,
+        default=DEFAULT_MAX_TOTAL_BYTES,
+        help="Estimate remaining files from their size once this many bytes were read "
+             f"(default: {DEFAULT_MAX_TOTAL_BYTES}; 0 for no limit)"
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE_SECONDS,
+        help="Wall-clock budget in seconds; remaining files are estimated from their size "
+             f"(default: {DEFAULT_DEADLINE_SECONDS:g}; 0 for no limit)"
+    )
+    parser.add_argument(
+        "--diff", "-d",
+        metavar="REV",
+        default=None,
+        help="Report token deltas of changed config files since git revision REV"
+    )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--fields", "-f",
+        default=None,
+        help="Comma-separated dotted fields to keep, e.g. totals,estimates.baseline_total "
+             "(with --jsonl, applies to each file line)"
+    )
+    parser.add_argument(
+        "--top", "-t",
+        type=int,
+        default=None,
+        help="Only list the N largest files (with --diff, the N largest deltas); N >= 1"
+    )
+    parser.add_argument(
+        "--summary-only",
+        action="store_true",
+        help="Only output totals and estimates, no per-file entries"
+    )
+    parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="Stream one compact JSON line per file as it is analyzed, then a summary line"
+    )
+
+    parser.add_argument(
+        "--warm",
+        action="store_true",
+        help="Vendor the cl100k_base BPE file and cache the prepared encoder, then exit"
+    )
+    parser.add_argument(
+        "--bpe-file",
+        default=None,
+        help="With --warm, use this local cl100k_base.tiktoken instead of downloading it"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.warm:
+        results = warm(args.bpe_file)
+        print(json.dumps(results, indent=2))
+        if results["status"] != "ok":
+            sys.exit(1)
+        return
+
+    if args.stdin:
+        if not args.project:
+            fields = read_payload_fields({"cwd": ("cwd",)})
+            if isinstance(fields["cwd"], str):
+                args.project = fields["cwd"]
+    args.project = args.project or "."
     
-    if args.files:
-        results = analyze_files(args.files)
+    if args.top is not None and args.top < 1:
+        parser.error("--top must be at least 1")
+
+    for flag in ("max_file_bytes", "max_total_bytes", "deadline"):
+        if getattr(args, flag) < 0:
+            parser.error(f"--{flag.replace('_', '-')} must be 0 (no limit) or more")
+
+    guard = None
+    if args.max_file_bytes or args.max_total_bytes or args.deadline:
+        guard = ResourceGuard(args.max_file_bytes or None, args.max_total_bytes or None,
+                              args.deadline or None)
+
+    fields = [f.strip() for f in args.fields.split(",") if f.strip()] if args.fields else None
+    largest = LargestFiles(args.top) if args.top and not args.summary_only else None
+    compact = bool(largest or args.summary_only or args.jsonl)
+
+    def emit_line(record: dict) -> None:
+        print(json.dumps(record, separators=(",", ":")), flush=True)
+
+    def on_file(analysis: dict) -> None:
+        if largest is not None:
+            largest.add(analysis)
+        elif args.jsonl and not args.summary_only:
+            emit_line(project_fields(analysis, fields) if fields else analysis)
+
+    if args.diff:
+        results = analyze_diff(args.project, args.diff)
+    elif args.files:
+        results = analyze_files(args.files, guard, on_file if compact else None)
     else:
-        results = analyze_project(args.project, system_estimate=args.system_estimate)
+        results = analyze_project(args.project, system_estimate=args.system_estimate, guard=guard)
         results["budget"] = args.budget
         results["budget_remaining"] = args.budget - results["estimates"]["baseline_total"]
         results["budget_used_percent"] = round(
             (results["estimates"]["baseline_total"] / args.budget) * 100, 1
         )
-    
-    print(json.dumps(results, indent=2))
+
+    if compact and (args.diff or not args.files):
+        for analysis in pop_file_entries(results):
+            on_file(analysis)
+    if largest is not None:
+        if args.jsonl:
+            for analysis in largest.items():
+                emit_line(project_fields(analysis, fields) if fields else analysis)
+        else:
+            results["files"] = largest.items()
+
+    if args.jsonl:
+        emit_line({"summary": results})
+    else:
+        print(json.dumps(project_fields(results, fields) if fields else results, indent=2))
 
 
 if __name__ == "__main__":
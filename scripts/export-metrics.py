@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Memento - Metrics Exporter
+"I have to believe that when my eyes are closed, the world's still there." — Watch every machine.
+
+Turns ~/.claude/memento-stats.json, memento-commands.json and the hook
+timings log into a Prometheus textfile for node_exporter's textfile
+collector, which only parses the classic text format; OpenMetrics is
+available for parsers that accept it. Counters and histograms live in a state file together with a
+cursor per source, so each run only reads what was logged since the last
+one; the hook timings log is append-only and read from a byte offset.
+Hooks start that log over once it passes 16 MiB, so it stays bounded when
+this exporter is not set up.
+
+Run it from cron or a systemd timer, e.g.:
+    */5 * * * * python3 ~/.claude/plugins/memento/scripts/export-metrics.py \\
+        --output /var/lib/node_exporter/textfile/memento.prom --quiet
+"""
+
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+CLAUDE_DIR = Path.home() / ".claude"
+STATS_FILE = CLAUDE_DIR / "memento-stats.json"
+COMMANDS_FILE = CLAUDE_DIR / "memento-commands.json"
+TIMINGS_FILE = CLAUDE_DIR / "memento-hook-timings.jsonl"
+STATE_FILE = CLAUDE_DIR / "memento-metrics-state.json"
+OUTPUT_FILE = CLAUDE_DIR / "memento.prom"
+
+# Once fully read and larger than this, the timings log is rotated away
+MAX_TIMINGS_BYTES = 1024 * 1024
+# Hooks start the log over past this size, so it stays bounded when the
+# exporter never runs
+MAX_TIMINGS_LOG_BYTES = 16 * 1024 * 1024
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    "memento_sessions": (
+        "counter", "Sessions started.", None),
+    "memento_commands": (
+        "counter", "Bash commands logged.", None),
+    "memento_command_output_tokens": (
+        "counter", "Tokens of Bash command output added to the context.", None),
+    "memento_baseline_tokens": (
+        "histogram", "Context baseline at session start in tokens.",
+        (5000, 10000, 15000, 20000, 30000, 50000, 80000, 120000, 200000)),
+    "memento_session_duration_seconds": (
+        "histogram", "Session duration in seconds.",
+        (300, 900, 1800, 3600, 7200, 14400, 28800)),
+    "memento_hook_duration_seconds": (
+        "histogram", "Hook wall-clock time in seconds.",
+        (0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)),
+}
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, interpreter startup included.
+
+    Linux reads the start time from /proc (10 ms granularity); elsewhere
+    psutil is used when installed. None when neither is available.
+    """
+    try:
+        with open("/proc/self/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")   # Since boot
+        if hasattr(time, "CLOCK_BOOTTIME"):
+            now = time.clock_gettime(time.CLOCK_BOOTTIME)
+        else:
+            with open("/proc/uptime", "r") as f:
+                now = float(f.read().split()[0])
+        return max(now - started, 0.0)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return max(time.time() - psutil.Process().create_time(), 0.0)
+    except Exception:
+        return None
+
+
+def record_hook_timing(hook: str, project_path: str) -> None:
+    """Log the calling hook process's wall time so far, if it can be measured."""
+    seconds = process_age()
+    if seconds is not None:
+        record_timing(hook, os.path.basename(project_path) or project_path, seconds)
+
+
+def record_timing(hook: str, project: str, seconds: float) -> None:
+    """Append one hook run to the timings log.
+
+    A log past MAX_TIMINGS_LOG_BYTES is dropped first; an exporter reading
+    it notices the shorter file and starts over from offset 0.
+    """
+    line = json.dumps({
+        "ts": round(time.time(), 3),
+        "hook": hook,
+        "project": project,
+        "seconds": round(seconds, 4)
+    }, separators=(",", ":"))
+    TIMINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        if TIMINGS_FILE.stat().st_size > MAX_TIMINGS_LOG_BYTES:
+            TIMINGS_FILE.unlink(missing_ok=True)
+    except OSError:
+        pass
+    with open(TIMINGS_FILE, 'a') as f:
+        f.write(line + "\n")
+
+
+def new_state() -> dict:
+    return {
+        "cursors": {
+            "session_started": "",
+            "session_ended": "",
+            "command": "",
+            "timings_offset": 0
+        },
+        "metrics": {},
+        "version": "1.0"
+    }
+
+
+def load_state() -> dict:
+    """Load exporter state or create new structure."""
+    if STATE_FILE.exists():
+        try:
+            with open(STATE_FILE, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
+    return new_state()
+
+
+def write_atomic(path: Path, text: str) -> None:
+    """Write via a temporary file and rename, so readers never see a partial file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def load_json(path: Path, key: str) -> list:
+    """Entries of a memento JSON log, or an empty list."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f).get(key, [])
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return []
+
+
+def label_key(**labels) -> str:
+    return json.dumps(sorted(labels.items()), separators=(",", ":"))
+
+
+def inc(state: dict, name: str, value: float = 1, **labels) -> None:
+    """Add to a counter."""
+    series = state["metrics"].setdefault(name, {})
+    key = label_key(**labels)
+    series[key] = series.get(key, 0) + value
+
+
+def observe(state: dict, name: str, value: float, **labels) -> None:
+    """Add an observation to a histogram ([per-bucket counts..., count, sum])."""
+    bounds = METRICS[name][2]
+    series = state["metrics"].setdefault(name, {})
+    hist = series.setdefault(label_key(**labels), [0] * (len(bounds) + 2))
+    for i, bound in enumerate(bounds):
+        if value <= bound:
+            hist[i] += 1
+            break
+    hist[-2] += 1
+    hist[-1] += value
+
+
+def ingest_sessions(state: dict) -> int:
+    """Count sessions started and ended since the cursors."""
+    cursors = state["cursors"]
+    started, ended = cursors["session_started"], cursors["session_ended"]
+    new = 0
+    for session in load_json(STATS_FILE, "sessions"):
+        project = session.get("project") or ""
+        if (session.get("started_at") or "") > started:
+            inc(state, "memento_sessions", project=project)
+            if session.get("baseline_tokens") is not None:
+                observe(state, "memento_baseline_tokens", session["baseline_tokens"], project=project)
+            cursors["session_started"] = max(cursors["session_started"], session["started_at"])
+            new += 1
+        if (session.get("ended_at") or "") > ended and session.get("duration_minutes") is not None:
+            observe(state, "memento_session_duration_seconds",
+                    session["duration_minutes"] * 60, project=project)
+            cursors["session_ended"] = max(cursors["session_ended"], session["ended_at"])
+    return new
+
+
+def ingest_commands(state: dict) -> int:
+    """Count commands logged since the cursor."""
+    cursors = state["cursors"]
+    since = cursors["command"]
+    new = 0
+    for entry in load_json(COMMANDS_FILE, "commands"):
+        timestamp = entry.get("timestamp") or ""
+        if timestamp <= since:
+            continue
+        project = entry.get("project") or ""
+        inc(state, "memento_commands", project=project)
+        if entry.get("output_tokens"):
+            inc(state, "memento_command_output_tokens", entry["output_tokens"], project=project)
+        cursors["command"] = max(cursors["command"], timestamp)
+        new += 1
+    return new
+
+
+def _read_timings(path: Path, offset: int, state: dict) -> tuple[int, int]:
+    """Observe complete timing lines from offset; returns (new offset, lines read)."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n") + 1   # Leave a partially written last line for next time
+    count = 0
+    for line in data[:end].splitlines():
+        try:
+            timing = json.loads(line)
+            observe(state, "memento_hook_duration_seconds", float(timing["seconds"]),
+                    hook=str(timing.get("hook", "")), project=str(timing.get("project", "")))
+            count += 1
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            continue
+    return offset + end, count
+
+
+def ingest_timings(state: dict) -> int:
+    """Observe hook timings appended since the stored byte offset."""
+    cursors = state["cursors"]
+    try:
+        size = TIMINGS_FILE.stat().st_size
+    except OSError:
+        cursors["timings_offset"] = 0
+        return 0
+    if size < cursors["timings_offset"]:
+        cursors["timings_offset"] = 0   # Replaced by someone else: start over
+
+    offset, count = _read_timings(TIMINGS_FILE, cursors["timings_offset"], state)
+    if offset > MAX_TIMINGS_BYTES:
+        # Rotate, then pick up anything appended before the rename
+        rotated = TIMINGS_FILE.with_name(TIMINGS_FILE.name + ".1")
+        os.replace(TIMINGS_FILE, rotated)
+        _, late = _read_timings(rotated, offset, state)
+        count += late
+        rotated.unlink()
+        offset = 0
+    cursors["timings_offset"] = offset
+    return count
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(pairs: list, extra: Optional[tuple] = None) -> str:
+    pairs = list(pairs) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(state: dict, fmt: str = "prometheus") -> str:
+    """Render all metrics in classic Prometheus (or OpenMetrics) text format."""
+    lines = []
+    for name, (kind, help_text, bounds) in METRICS.items():
+        series = state["metrics"].get(name)
+        if not series:
+            continue
+        # OpenMetrics names the counter family without the _total suffix
+        family = name if kind != "counter" or fmt == "openmetrics" else name + "_total"
+        lines.append(f"# TYPE {family} {kind}")
+        lines.append(f"# HELP {family} {help_text}")
+        for key in sorted(series):
+            pairs = json.loads(key)
+            value = series[key]
+            if kind == "counter":
+                lines.append(f"{name}_total{_labels(pairs)} {_number(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(bounds, value):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(pairs, ('le', float(bound)))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(pairs, ('le', '+Inf'))} {value[-2]}")
+            lines.append(f"{name}_count{_labels(pairs)} {value[-2]}")
+            lines.append(f"{name}_sum{_labels(pairs)} {_number(round(value[-1], 6))}")
+    if fmt == "openmetrics":
+        lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+def export(output: Path = OUTPUT_FILE, fmt: str = "prometheus", reset: bool = False) -> dict:
+    """Fold new log entries into the stored state and rewrite the textfile."""
+    state = new_state() if reset else load_state()
+    new = {
+        "sessions": ingest_sessions(state),
+        "commands": ingest_commands(state),
+        "hook_runs": ingest_timings(state)
+    }
+    state["updated_at"] = datetime.now().isoformat()
+
+    # State first: a crash before the textfile is written only delays it
+    write_atomic(STATE_FILE, json.dumps(state, separators=(",", ":")))
+    write_atomic(output, render(state, fmt))
+    return {"status": "ok", "output": str(output), "format": fmt, "new": new}
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Prometheus/OpenMetrics Exporter"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        default=str(OUTPUT_FILE),
+        help=f"Textfile to write (default: {OUTPUT_FILE})"
+    )
+    parser.add_argument(
+        "--format", "-f",
+        default="prometheus",
+        choices=["prometheus", "openmetrics"],
+        help="Classic Prometheus text format as node_exporter's textfile collector "
+             "expects, or OpenMetrics (default: prometheus)"
+    )
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="Discard stored counters and cursors and rebuild from the logs"
+    )
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Suppress output"
+    )
+
+    args = parser.parse_args()
+
+    try:
+        results = export(Path(args.output).expanduser(), args.format, args.reset)
+    except OSError as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        sys.exit(1)
+
+    if not args.quiet:
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Memento - Session Forecaster
+"I can't remember to forget you." — Let past sessions predict the next one.
+
+Fits per-project log-normal distributions of session duration (from
+~/.claude/memento-stats.json) and context growth rate in tokens/minute, then
+runs a Monte Carlo simulation to forecast the chance of hitting the context
+limit (and optionally a rate limit) within N minutes. Uses NumPy when
+available, pure Python otherwise. Results are cached until new sessions or
+commands are logged.
+
+The growth rate is measured, not assumed: it is the Bash output tokens logged
+by the PostToolUse hook (memento-commands.json) within each session, divided
+by its duration. That leaves out messages and file reads, so it is a lower
+bound. Without enough measured sessions the rate falls back to the prior and
+is reported as such.
+"""
+
+import json
+import math
+import random
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+STATS_FILE = Path.home() / ".claude" / "memento-stats.json"
+COMMANDS_FILE = Path.home() / ".claude" / "memento-commands.json"
+CACHE_FILE = Path.home() / ".claude" / "memento-forecast-cache.json"
+
+DEFAULT_SIMULATIONS = 10000
+DEFAULT_LIMIT = 200000
+MIN_SESSIONS = 3        # Fewer project sessions than this: fit on all projects
+RATE_MEASURES = "bash_output_tokens"
+MIN_SIGMA = 0.1         # Floor for fitted log-normal spread
+
+# Prior used when there is no usable history; the rate matches the flat
+# ~500 tokens/minute guess log-session.py stores as final_tokens, which is
+# why final_tokens is never fitted
+PRIOR = {
+    "duration": {"mu": math.log(45), "sigma": 0.75},
+    "rate": {"mu": math.log(500), "sigma": 0.5},
+}
+
+
+def load_stats() -> dict:
+    """Load session stats, or an empty structure."""
+    if STATS_FILE.exists():
+        try:
+            with open(STATS_FILE, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {"sessions": [], "version": "1.0"}
+
+
+def load_commands() -> list[dict]:
+    """Logged commands with a measured output cost."""
+    if COMMANDS_FILE.exists():
+        try:
+            with open(COMMANDS_FILE, 'r') as f:
+                commands = json.load(f).get("commands", [])
+            return [c for c in commands if c.get("output_tokens") and c.get("timestamp")]
+        except (json.JSONDecodeError, IOError, AttributeError):
+            pass
+    return []
+
+
+def completed_sessions(stats: dict) -> list[dict]:
+    """Closed sessions with a usable duration."""
+    return [
+        s for s in stats.get("sessions", [])
+        if s.get("ended_at") and (s.get("duration_minutes") or 0) > 0
+    ]
+
+
+def measured_rates(sessions: list[dict], commands: list[dict]) -> list[tuple[dict, float]]:
+    """Pair sessions with their measured growth rate in tokens/minute.
+
+    Growth is the output tokens of the session project's commands logged
+    between its start and end. Sessions without any measured command are
+    left out rather than counted as zero growth.
+    """
+    by_project = {}
+    for command in commands:
+        by_project.setdefault(command.get("project"), []).append(
+            (command["timestamp"], command["output_tokens"]))
+
+    rates = []
+    for session in sessions:
+        window = [
+            tokens for ts, tokens in by_project.get(session.get("project"), [])
+            if session["started_at"] <= ts <= session["ended_at"]
+        ]
+        if window:
+            rates.append((session, sum(window) / session["duration_minutes"]))
+    return rates
+
+
+def fit_lognormal(values: list[float]) -> dict:
+    """Maximum-likelihood log-normal fit."""
+    logs = [math.log(v) for v in values]
+    mu = sum(logs) / len(logs)
+    variance = sum((x - mu) ** 2 for x in logs) / len(logs)
+    return {"mu": mu, "sigma": max(math.sqrt(variance), MIN_SIGMA)}
+
+
+def _select(items: list, project: Optional[str], project_of) -> tuple[list, str]:
+    """Project items, falling back to all projects, then to the prior."""
+    selected = [i for i in items if project is None or project_of(i) == project]
+    source = "project" if project else "all"
+    if len(selected) < MIN_SESSIONS and project is not None:
+        selected, source = items, "all"
+    if len(selected) < MIN_SESSIONS:
+        return selected, "prior"
+    return selected, source
+
+
+def fit_project(sessions: list[dict], rates: list[tuple[dict, float]],
+                project: Optional[str]) -> dict:
+    """Fit duration and growth-rate distributions for a project.
+
+    Each falls back to all projects, then to the prior, independently, when
+    there is too little history.
+    """
+    durations, duration_source = _select(sessions, project, lambda s: s.get("project"))
+    measured, rate_source = _select(rates, project, lambda r: r[0].get("project"))
+    return {
+        "duration_source": duration_source,
+        "duration_sessions": len(durations),
+        "rate_source": rate_source,
+        "rate_sessions": len(measured),
+        "duration": (PRIOR["duration"] if duration_source == "prior"
+                     else fit_lognormal([s["duration_minutes"] for s in durations])),
+        "rate": (PRIOR["rate"] if rate_source == "prior"
+                 else fit_lognormal([rate for _, rate in measured])),
+    }
+
+
+def latest_baseline(stats: dict, project: Optional[str]) -> int:
+    """Most recent recorded baseline for a project (or overall)."""
+    for session in reversed(stats.get("sessions", [])):
+        if project is None or session.get("project") == project:
+            if session.get("baseline_tokens"):
+                return session["baseline_tokens"]
+    return 10000  # Default system prompt estimate, as in count-tokens.py
+
+
+def _quantiles(sorted_values, qs: tuple) -> list[float]:
+    """Nearest-rank quantiles (infinite values stay infinite)."""
+    n = len(sorted_values)
+    return [sorted_values[min(int(q * n), n - 1)] for q in qs]
+
+
+def simulate(fit: dict, baseline: int, minutes: float, limit: int,
+             rate_limit: Optional[int], simulations: int, seed: int) -> dict:
+    """Monte Carlo forecast of context growth over the next N minutes.
+
+    Each run draws a session duration D and growth rate R; context after t
+    minutes is baseline + R * min(t, D). Rate-limit usage is the tokens added
+    within the window.
+    """
+    d, r = fit["duration"], fit["rate"]
+    headroom = max(limit - baseline, 0)
+
+    if NUMPY_AVAILABLE:
+        rng = np.random.default_rng(seed)
+        durations = rng.lognormal(d["mu"], d["sigma"], simulations)
+        rates = rng.lognormal(r["mu"], r["sigma"], simulations)
+        active = np.minimum(durations, minutes)
+        added = rates * active
+        time_to_limit = np.where(headroom / rates <= durations, headroom / rates, np.inf)
+        p_context = float(np.mean(added >= headroom))
+        p_rate = float(np.mean(added >= rate_limit)) if rate_limit else None
+        ttl = [float(x) for x in _quantiles(np.sort(time_to_limit), (0.1, 0.5, 0.9))]
+        added_q = [float(x) for x in _quantiles(np.sort(added), (0.5, 0.9))]
+    else:
+        rng = random.Random(seed)
+        added = []
+        time_to_limit = []
+        for _ in range(simulations):
+            duration = rng.lognormvariate(d["mu"], d["sigma"])
+            rate = rng.lognormvariate(r["mu"], r["sigma"])
+            added.append(rate * min(duration, minutes))
+            ttl_run = headroom / rate
+            time_to_limit.append(ttl_run if ttl_run <= duration else math.inf)
+        p_context = sum(1 for a in added if a >= headroom) / simulations
+        p_rate = sum(1 for a in added if a >= rate_limit) / simulations if rate_limit else None
+        ttl = _quantiles(sorted(time_to_limit), (0.1, 0.5, 0.9))
+        added_q = _quantiles(sorted(added), (0.5, 0.9))
+
+    def minutes_or_none(value: float) -> Optional[float]:
+        return round(value, 1) if math.isfinite(value) else None
+
+    return {
+        "p_context_limit": round(p_context, 4),
+        "p_rate_limit": round(p_rate, 4) if p_rate is not None else None,
+        "time_to_limit_minutes": {
+            "p10": minutes_or_none(ttl[0]),
+            "p50": minutes_or_none(ttl[1]),
+            "p90": minutes_or_none(ttl[2]),
+        },
+        "conversation_tokens": {
+            "p50": int(added_q[0]),
+            "p90": int(added_q[1]),
+        },
+    }
+
+
+def fingerprint(stats: dict, commands: list[dict]) -> str:
+    """Changes whenever a session is added or closed, or a command measured."""
+    sessions = stats.get("sessions", [])
+    closed = sum(1 for s in sessions if s.get("ended_at"))
+    last = sessions[-1] if sessions else {}
+    last_command = commands[-1]["timestamp"] if commands else None
+    return (f"{len(sessions)}:{closed}:{last.get('id')}:{last.get('ended_at')}:"
+            f"{len(commands)}:{last_command}")
+
+
+def load_cache(key: str) -> dict:
+    """Cached results for the current stats fingerprint."""
+    if CACHE_FILE.exists():
+        try:
+            with open(CACHE_FILE, 'r') as f:
+                cache = json.load(f)
+            if cache.get("fingerprint") == key:
+                return cache
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {"fingerprint": key, "results": {}}
+
+
+def save_cache(cache: dict) -> None:
+    """Save cache, creating directory if needed."""
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(cache, f)
+
+
+def forecast(project: Optional[str] = None, minutes: float = 60, limit: int = DEFAULT_LIMIT,
+             rate_limit: Optional[int] = None, simulations: int = DEFAULT_SIMULATIONS,
+             seed: int = 0, use_cache: bool = True) -> dict:
+    """Forecast a session for project, reusing cached results when possible."""
+    stats = load_stats()
+    commands = load_commands()
+    params = json.dumps([project, minutes, limit, rate_limit, simulations, seed])
+    cache = load_cache(fingerprint(stats, commands)) if use_cache else None
+    if cache and params in cache["results"]:
+        return {**cache["results"][params], "cached": True}
+
+    sessions = completed_sessions(stats)
+    fit = fit_project(sessions, measured_rates(sessions, commands), project)
+    baseline = latest_baseline(stats, project)
+    outcome = simulate(fit, baseline, minutes, limit, rate_limit, simulations, seed)
+
+    # Tokens left for files after leaving room for a p90 conversation
+    file_budget = max(limit - baseline - outcome["conversation_tokens"]["p90"], 0)
+
+    result = {
+        "project": project,
+        "minutes": minutes,
+        "limit": limit,
+        "rate_limit": rate_limit,
+        "baseline_tokens": baseline,
+        "simulations": simulations,
+        "engine": "numpy" if NUMPY_AVAILABLE else "python",
+        "fit": {
+            "duration_source": fit["duration_source"],
+            "duration_sessions": fit["duration_sessions"],
+            "rate_source": fit["rate_source"],
+            "rate_sessions": fit["rate_sessions"],
+            "rate_measures": RATE_MEASURES if fit["rate_source"] != "prior" else None,
+            "median_duration_minutes": round(math.exp(fit["duration"]["mu"]), 1),
+            "median_tokens_per_minute": round(math.exp(fit["rate"]["mu"]), 1),
+        },
+        **outcome,
+        "recommendation": {
+            "file_budget_tokens": file_budget,
+            "safe_minutes": outcome["time_to_limit_minutes"]["p10"],
+        },
+        "cached": False,
+    }
+
+    if cache is not None:
+        cache["results"][params] = result
+        save_cache(cache)
+    return result
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Monte Carlo Session Forecaster"
+    )
+    parser.add_argument(
+        "--project", "-p",
+        default=None,
+        help="Project name (default: all projects)"
+    )
+    parser.add_argument(
+        "--minutes", "-m",
+        type=float,
+        default=60,
+        help="Forecast window in minutes (default: 60)"
+    )
+    parser.add_argument(
+        "--limit", "-l",
+        type=int,
+        default=DEFAULT_LIMIT,
+        help=f"Context window limit in tokens (default: {DEFAULT_LIMIT})"
+    )
+    parser.add_argument(
+        "--rate-limit", "-r",
+        type=int,
+        default=None,
+        help="Also forecast exceeding this many tokens within the window"
+    )
+    parser.add_argument(
+        "--simulations", "-n",
+        type=int,
+        default=DEFAULT_SIMULATIONS,
+        help=f"Number of Monte Carlo runs (default: {DEFAULT_SIMULATIONS})"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed (default: 0)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore and do not update the forecast cache"
+    )
+
+    args = parser.parse_args()
+
+    results = forecast(
+        project=args.project,
+        minutes=args.minutes,
+        limit=args.limit,
+        rate_limit=args.rate_limit,
+        simulations=max(args.simulations, 1),
+        seed=args.seed,
+        use_cache=not args.no_cache
+    )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
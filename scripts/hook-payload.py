@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Memento - Hook Payload Reader
+"Don't believe his lies." — Read only what the hook needs.
+
+Claude Code passes hook events as a JSON object on stdin. This reader streams
+stdin in chunks, keeps at most max_bytes of it in memory and drains the rest,
+so a multi-megabyte heredoc command or tool output never slows a hook down or
+breaks it. Only the requested fields are returned.
+
+When the payload is larger than the cap, the kept prefix is not valid JSON;
+fields are then recovered from it by key path. Claude Code writes small fields
+(cwd, hook_event_name, tool_input) before tool_response, so they survive the
+cut; long string values are returned up to the cut. Past the cut, the
+string values of chosen keys (e.g. stdout) can still be streamed, unescaped,
+to a callback.
+"""
+
+import codecs
+import json
+import re
+import sys
+from typing import Callable, Optional
+
+MAX_PAYLOAD_BYTES = 1024 * 1024   # Keep at most 1 MiB of a payload
+CHUNK_SIZE = 64 * 1024
+
+
+def _get_path(payload: dict, path: tuple):
+    """Follow a key path through nested dicts."""
+    value = payload
+    for key in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _decode_partial_string(text: str, start: int) -> Optional[str]:
+    """Decode a JSON string starting after its opening quote, even if cut off."""
+    try:
+        value, _ = json.decoder.scanstring(text, start)
+        return value
+    except (json.JSONDecodeError, ValueError):
+        pass
+
+    # Unterminated: drop up to one incomplete escape at the cut and close it,
+    # and half a surrogate pair; _StringValues picks both up past the cut
+    tail = text[start:]
+    for trim in range(0, 7):
+        candidate = tail[:len(tail) - trim]
+        try:
+            value = json.loads('"' + candidate + '"')
+        except json.JSONDecodeError:
+            continue
+        if value and "\ud800" <= value[-1] <= "\udbff":
+            value = value[:-1]
+        return value
+    return None
+
+
+def _extract_partial(text: str, path: tuple):
+    """Recover a field from a truncated JSON prefix by walking its key path."""
+    pos = 0
+    for key in path:
+        match = re.compile(r'"%s"\s*:\s*' % re.escape(key)).search(text, pos)
+        if not match:
+            return None
+        pos = match.end()
+
+    if pos >= len(text):
+        return None
+    if text[pos] == '"':
+        return _decode_partial_string(text, pos + 1)
+
+    try:
+        value, _ = json.JSONDecoder().raw_decode(text, pos)
+        return value
+    except json.JSONDecodeError:
+        return None
+
+
+_HIGH_SURROGATE = re.compile(r'u[dD][89abAB][0-9a-fA-F]{2}')
+
+
+def _incomplete_escape(text: str, start: int, end: int) -> int:
+    """Where an escape cut off at end begins in string content, else end.
+
+    Half a surrogate pair counts as cut off, so the pair is decoded together.
+    """
+    i = text.find("\\", max(start, end - 12), end)
+    if i < 0:
+        return end
+    while i > start and text[i - 1] == "\\":   # Back to an escape boundary
+        i -= 1
+    while True:
+        i = text.find("\\", i, end)
+        if i < 0:
+            return end
+        # Escapes are 2 chars, \uXXXX is 6, a surrogate pair 12
+        length = 2
+        if text.startswith("u", i + 1):
+            length = 6
+            if _HIGH_SURROGATE.match(text, i + 1) and (
+                    i + 8 > end or text.startswith("\\u", i + 6)):
+                length = 12
+        if i + length > end:
+            return i
+        i += length
+
+
+class _StringValues:
+    """Incrementally unescape the string values of some keys in a JSON stream.
+
+    Fed consecutive pieces of a JSON document, it hands the decoded content
+    of string values whose key is in keys (any key when None) to emit, piece
+    by piece. UTF-8 sequences and escapes split between pieces are carried
+    over. Nesting is not tracked: a string is the value of the last key
+    string before its ':'.
+    """
+
+    def __init__(self, keys, emit: Callable[[str], None]):
+        self.keys = set(keys) if keys is not None else None
+        self.emit = emit
+        self.emitting = True
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.carry = ""           # Escape cut off at the end of the last piece
+        self.in_string = False
+        self.is_value = False
+        self.last = ""            # Last significant character outside strings
+        self.key = None
+        self.key_parts = []
+
+    def feed(self, data: bytes) -> None:
+        text = self.carry + self.decoder.decode(data)
+        self.carry = ""
+        pos, n = 0, len(text)
+        while pos < n:
+            if not self.in_string:
+                quote = text.find('"', pos)
+                before = text[pos:quote if quote >= 0 else n].rstrip()
+                if before:
+                    self.last = before[-1]
+                if quote < 0:
+                    return
+                self.in_string = True
+                self.is_value = self.last == ":"
+                self.key_parts = []
+                pos = quote + 1
+                continue
+
+            start, end, closed = pos, n, False
+            while True:
+                quote = text.find('"', pos)
+                if quote < 0:
+                    end = _incomplete_escape(text, start, n)
+                    break
+                run = quote
+                while run > start and text[run - 1] == "\\":
+                    run -= 1
+                if (quote - run) % 2 == 0:   # Not itself escaped
+                    end, closed = quote, True
+                    break
+                pos = quote + 1
+
+            self._content(text[start:end])
+            if not closed:
+                self.carry = text[end:]
+                return
+            self.in_string = False
+            self.last = '"'
+            if not self.is_value:
+                self.key = "".join(self.key_parts)
+            pos = end + 1
+
+    def _content(self, raw: str) -> None:
+        if not raw:
+            return
+        if not self.is_value:
+            if sum(map(len, self.key_parts)) < 256:   # Keys are short
+                self.key_parts.append(raw)
+        elif self.emitting and (self.keys is None or self.key in self.keys):
+            try:
+                self.emit(json.loads('"' + raw + '"', strict=False))
+            except json.JSONDecodeError:
+                self.emit(raw)
+
+
+def read_hook_payload(fields: dict, stream=None, max_bytes: int = MAX_PAYLOAD_BYTES,
+                      overflow: Optional[Callable[[str], None]] = None,
+                      overflow_keys: Optional[tuple] = None) -> dict:
+    """Read a hook event from stdin and pull out only the requested fields.
+
+    fields maps result names to key paths, e.g.
+    {"command": ("tool_input", "command"), "cwd": ("cwd",)}.
+    Bytes beyond max_bytes are drained in chunks without being kept. If
+    overflow is given, the unescaped content they hold of string values
+    whose key is in overflow_keys (any key when None) is handed to it piece
+    by piece, e.g. the rest of tool_response.stdout; keys are matched by
+    name, not by path.
+
+    Returns {"fields": {...}, "bytes": total bytes read, "truncated": bool}.
+    """
+    if stream is None:
+        stream = sys.stdin.buffer
+
+    kept = bytearray()
+    total = 0
+    scanner = None
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        total += len(chunk)
+        room = max_bytes - len(kept)
+        if room > 0:
+            kept += chunk[:room]
+            chunk = chunk[room:]
+        if chunk and overflow:
+            if scanner is None:
+                # Catch up on the kept prefix to know where the cut fell
+                scanner = _StringValues(overflow_keys, overflow)
+                scanner.emitting = False
+                scanner.feed(bytes(kept))
+                scanner.emitting = True
+            scanner.feed(chunk)
+
+    truncated = total > len(kept)
+    text = kept.decode("utf-8", errors="ignore")
+    values = {}
+
+    payload = None
+    if not truncated:
+        try:
+            payload = json.loads(text) if text.strip() else {}
+        except json.JSONDecodeError:
+            payload = None
+
+    for name, path in fields.items():
+        if isinstance(payload, dict):
+            values[name] = _get_path(payload, path)
+        else:
+            values[name] = _extract_partial(text, path)
+
+    return {"fields": values, "bytes": total, "truncated": truncated}
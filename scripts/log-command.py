@@ -11,11 +11,43 @@ import sys
 import os
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+# Import token counting from sibling module; other siblings are loaded
+# through its cached load_sibling
+SCRIPT_DIR = Path(__file__).parent
+
+from importlib.util import spec_from_loader, module_from_spec
+from importlib.machinery import SourceFileLoader
+
+spec = spec_from_loader("count_tokens", SourceFileLoader("count_tokens", str(SCRIPT_DIR / "count-tokens.py")))
+count_tokens_module = module_from_spec(spec)
+spec.loader.exec_module(count_tokens_module)
+load_sibling = count_tokens_module.load_sibling
 
 COMMANDS_FILE = Path.home() / ".claude" / "memento-commands.json"
 MAX_COMMANDS = 500  # Keep last N commands
 
 
+def output_stream(exact: bool = False):
+    """A TokenStream for Bash output.
+
+    The hook runs after every Bash call, so output is counted with tiktoken
+    only when the warm encoder cache is present (count-tokens.py --warm);
+    otherwise with the ~4 chars/token estimate. exact=True always uses
+    tiktoken when it is installed.
+    """
+    return count_tokens_module.TokenStream(
+        counter=None if exact else count_tokens_module.hook_counter()
+    )
+
+
+def is_estimate(stream) -> bool:
+    """True when a TokenStream's count is not an exact tiktoken count."""
+    return (stream.sampled or stream.counter is count_tokens_module.estimate_tokens
+            or not count_tokens_module.TIKTOKEN_AVAILABLE)
+
+
 def load_commands() -> dict:
     """Load existing command log or create new structure."""
     if COMMANDS_FILE.exists():
@@ -34,11 +66,8 @@ def save_commands(data: dict) -> None:
         json.dump(data, f, indent=2)
 
 
-def log_command(tool_input: str, project_path: str) -> None:
-    """Log a command execution."""
-    data = load_commands()
-
-    # Parse tool input to extract command if JSON
+def parse_command(tool_input: str) -> str:
+    """Extract the command from tool input, which may be a JSON object."""
     command = tool_input
     if tool_input.startswith('{'):
         try:
@@ -46,12 +75,113 @@ def log_command(tool_input: str, project_path: str) -> None:
             command = parsed.get("command", tool_input)
         except json.JSONDecodeError:
             pass
+    return command[:500]  # Truncate very long commands
+
+
+# Hook payload fields used by the logger (see hook-payload.py)
+PAYLOAD_FIELDS = {
+    "command": ("tool_input", "command"),
+    "cwd": ("cwd",),
+    "stdout": ("tool_response", "stdout"),
+    "stderr": ("tool_response", "stderr"),
+}
+
+
+def read_payload(max_bytes: Optional[int] = None, exact: bool = False) -> tuple[dict, Optional[dict]]:
+    """Read the PostToolUse hook payload from stdin.
+
+    Returns the extracted fields and the output token cost. Payload bytes
+    beyond the reader's cap are not kept; the stdout and stderr text they
+    hold is unescaped and fed straight into a second TokenStream, so the
+    cost still covers the whole output.
+    """
+    hook_payload = load_sibling("hook-payload.py", "hook_payload")
+
+    tail = output_stream(exact)
+    result = hook_payload.read_hook_payload(
+        PAYLOAD_FIELDS,
+        max_bytes=max_bytes or hook_payload.MAX_PAYLOAD_BYTES,
+        overflow=tail.feed,
+        overflow_keys=("stdout", "stderr")
+    )
+    fields = result["fields"]
+
+    output = None
+    if fields["stdout"] is not None or fields["stderr"] is not None:
+        output = measure_output(
+            {"stdout": fields["stdout"], "stderr": fields["stderr"]}, tail, exact
+        )
+    return fields, output
+
+
+def measure_output(tool_response, tail=None, exact: bool = False) -> Optional[dict]:
+    """Token cost of a Bash tool response (stdout + stderr).
+
+    Large outputs are estimated from samples (see TokenStream in
+    count-tokens.py), so this returns quickly even for multi-MB output.
+    tail is an optional TokenStream holding output cut off by the payload
+    reader. output_estimated tells whether the count is exact.
+    """
+    if tool_response is None:
+        return None
+
+    if isinstance(tool_response, dict):
+        parts = [tool_response.get("stdout") or "", tool_response.get("stderr") or ""]
+    else:
+        parts = [str(tool_response)]
+
+    stream = output_stream(exact)
+    for part in parts:
+        if isinstance(part, str):
+            stream.feed(part)
+
+    tokens = stream.count()
+    chars = stream.total_chars
+    estimated = is_estimate(stream)
+    if tail is not None and tail.total_chars:
+        tokens += tail.count()
+        chars += tail.total_chars
+        estimated = estimated or is_estimate(tail)
+
+    return {
+        "output_tokens": tokens,
+        "output_chars": chars,
+        "output_estimated": estimated
+    }
+
+
+def record_stats(command: str, project: str, output_tokens: Optional[int] = None) -> None:
+    """Update the command family tries (see command-stats.py), ignoring failures."""
+    try:
+        load_sibling("command-stats.py", "command_stats").record(
+            command, project, output_tokens=output_tokens
+        )
+    except Exception:
+        pass
+
+
+def log_command_binary(tool_input: str, project_path: str, output: Optional[dict] = None) -> None:
+    """Append a command to the compact binary log (see command-log.py)."""
+    command_log = load_sibling("command-log.py", "command_log")
+    command = parse_command(tool_input)
+    project = os.path.basename(project_path) or project_path
+    output_tokens = output["output_tokens"] if output else None
+    with command_log.CommandLogWriter() as writer:
+        writer.append(command, project, output_tokens=output_tokens)
+    record_stats(command, project, output_tokens)
+
+
+def log_command(tool_input: str, project_path: str, output: Optional[dict] = None) -> None:
+    """Log a command execution, with its output token cost when known."""
+    data = load_commands()
 
     entry = {
-        "command": command[:500],  # Truncate very long commands
+        "command": parse_command(tool_input),
         "project": os.path.basename(project_path) or project_path,
         "timestamp": datetime.now().isoformat()
     }
+    if output:
+        entry.update(output)
 
     data["commands"].append(entry)
 
@@ -60,6 +190,7 @@ def log_command(tool_input: str, project_path: str) -> None:
         data["commands"] = data["commands"][-MAX_COMMANDS:]
 
     save_commands(data)
+    record_stats(entry["command"], entry["project"], entry.get("output_tokens"))
 
 
 def main():
@@ -76,8 +207,29 @@ def main():
     )
     parser.add_argument(
         "--project", "-p",
-        default=".",
-        help="Project path"
+        default=None,
+        help="Project path (default: payload cwd with --stdin, else current directory)"
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read the hook event JSON (command, cwd, output) from stdin"
+    )
+    parser.add_argument(
+        "--max-payload-bytes",
+        type=int,
+        default=None,
+        help="Keep at most this many bytes of the stdin payload (default: 1 MiB)"
+    )
+    parser.add_argument(
+        "--exact-output",
+        action="store_true",
+        help="Count output tokens with tiktoken even without the warm encoder cache (slower per hook run)"
+    )
+    parser.add_argument(
+        "--binary", "-b",
+        action="store_true",
+        help="Append to the compact binary log (memento-commands.bin) instead of JSON"
     )
     parser.add_argument(
         "--quiet", "-q",
@@ -87,11 +239,31 @@ def main():
 
     args = parser.parse_args()
 
-    if args.tool_input:
-        log_command(args.tool_input, args.project)
+    tool_input = args.tool_input
+    project = args.project
+    output = None
+    if args.stdin:
+        fields, output = read_payload(args.max_payload_bytes, args.exact_output)
+        if not tool_input and isinstance(fields["command"], str):
+            tool_input = fields["command"]
+        if not project and isinstance(fields["cwd"], str):
+            project = fields["cwd"]
+    project = project or "."
+
+    if tool_input:
+        if args.binary:
+            log_command_binary(tool_input, project, output)
+        else:
+            log_command(tool_input, project, output)
         if not args.quiet:
             print(json.dumps({"status": "logged"}))
 
+    if args.stdin:
+        try:
+            load_sibling("export-metrics.py", "export_metrics").record_hook_timing("command", project)
+        except Exception:
+            pass   # Timings are optional
+
 
 if __name__ == "__main__":
     main()
@@ -26,15 +26,37 @@ try:
     spec = spec_from_loader("count_tokens", SourceFileLoader("count_tokens", str(count_tokens_path)))
     count_tokens_module = module_from_spec(spec)
     spec.loader.exec_module(count_tokens_module)
+    # Other siblings are loaded through count-tokens.py's cached loader
+    load_sibling = count_tokens_module.load_sibling
     analyze_project = count_tokens_module.analyze_project
 except Exception:
     # Fallback: run as subprocess
+    count_tokens_module = None
     analyze_project = None
 
+try:
+    trend_store = load_sibling("trend-store.py", "trend_store")
+except Exception:
+    # Trends are optional; session logging works without them
+    trend_store = None
+
 
 STATS_FILE = Path.home() / ".claude" / "memento-stats.json"
 MAX_SESSIONS = 50  # Keep last N sessions
 
+# Resource limits for the baseline analysis, so the SessionStart hook always
+# finishes quickly; anything past them is estimated from file size
+HOOK_MAX_FILE_BYTES = 2 * 1024 * 1024
+HOOK_MAX_TOTAL_BYTES = 20 * 1024 * 1024
+HOOK_DEADLINE_SECONDS = 3.0
+
+# Hook event names mapped to session events
+HOOK_EVENTS = {
+    "SessionStart": "start",
+    "Stop": "stop",
+    "SessionEnd": "stop",
+}
+
 
 def load_stats() -> dict:
     """Load existing stats or create new structure."""
@@ -58,7 +80,10 @@ def get_baseline_tokens(project_path: str) -> int:
     """Get current baseline token count for project."""
     if analyze_project:
         try:
-            result = analyze_project(project_path)
+            guard = count_tokens_module.ResourceGuard(
+                HOOK_MAX_FILE_BYTES, HOOK_MAX_TOTAL_BYTES, HOOK_DEADLINE_SECONDS
+            )
+            result = analyze_project(project_path, guard=guard)
             return result.get("estimates", {}).get("baseline_total", 0)
         except Exception:
             pass
@@ -67,7 +92,12 @@ def get_baseline_tokens(project_path: str) -> int:
     import subprocess
     try:
         result = subprocess.run(
-            [sys.executable, str(SCRIPT_DIR / "count-tokens.py"), "--project", project_path],
+            [
+                sys.executable, str(SCRIPT_DIR / "count-tokens.py"), "--project", project_path,
+                "--max-file-bytes", str(HOOK_MAX_FILE_BYTES),
+                "--max-total-bytes", str(HOOK_MAX_TOTAL_BYTES),
+                "--deadline", str(HOOK_DEADLINE_SECONDS)
+            ],
             capture_output=True,
             text=True,
             timeout=30
@@ -81,6 +111,16 @@ def get_baseline_tokens(project_path: str) -> int:
     return 0
 
 
+def record_trend(project: str, metric: str, value) -> None:
+    """Record a metric in the long-term trend store, ignoring failures."""
+    if trend_store is None or value is None:
+        return
+    try:
+        trend_store.record(project, metric, value)
+    except Exception:
+        pass
+
+
 def log_session_start(project_path: str) -> str:
     """Log a new session start. Returns session ID."""
     stats = load_stats()
@@ -106,6 +146,7 @@ def log_session_start(project_path: str) -> str:
         stats["sessions"] = stats["sessions"][-MAX_SESSIONS:]
 
     save_stats(stats)
+    record_trend(session["project"], "baseline_tokens", baseline_tokens)
     return session_id
 
 
@@ -131,11 +172,22 @@ def log_session_stop(project_path: str) -> Optional[str]:
             session["duration_minutes"] = round(duration, 1)
 
             save_stats(stats)
+            record_trend(session["project"], "duration_minutes", session["duration_minutes"])
             return session["id"]
 
     return None
 
 
+def read_payload() -> dict:
+    """Read cwd and event name from the hook event JSON on stdin."""
+    hook_payload = load_sibling("hook-payload.py", "hook_payload")
+    result = hook_payload.read_hook_payload({
+        "cwd": ("cwd",),
+        "hook_event_name": ("hook_event_name",),
+    })
+    return result["fields"]
+
+
 def main():
     """CLI entry point."""
     import argparse
@@ -145,14 +197,19 @@ def main():
     )
     parser.add_argument(
         "--event", "-e",
-        required=True,
+        default=None,
         choices=["start", "stop"],
-        help="Session event type"
+        help="Session event type (required unless --stdin provides it)"
     )
     parser.add_argument(
         "--project", "-p",
-        default=".",
-        help="Project path"
+        default=None,
+        help="Project path (default: payload cwd with --stdin, else current directory)"
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Read the hook event JSON (cwd, hook_event_name) from stdin"
     )
     parser.add_argument(
         "--quiet", "-q",
@@ -162,18 +219,36 @@ def main():
 
     args = parser.parse_args()
 
-    if args.event == "start":
-        session_id = log_session_start(args.project)
+    event = args.event
+    project = args.project
+    if args.stdin:
+        fields = read_payload()
+        event = event or HOOK_EVENTS.get(fields["hook_event_name"])
+        if not project and isinstance(fields["cwd"], str):
+            project = fields["cwd"]
+    project = project or "."
+
+    if event is None:
+        parser.error("--event is required (or pass --stdin with a known hook_event_name)")
+
+    if event == "start":
+        session_id = log_session_start(project)
         if not args.quiet:
             print(json.dumps({"status": "started", "session_id": session_id}))
     else:
-        session_id = log_session_stop(args.project)
+        session_id = log_session_stop(project)
         if not args.quiet:
             if session_id:
                 print(json.dumps({"status": "stopped", "session_id": session_id}))
             else:
                 print(json.dumps({"status": "no_open_session"}))
 
+    if args.stdin:
+        try:
+            load_sibling("export-metrics.py", "export_metrics").record_hook_timing(f"session_{event}", project)
+        except Exception:
+            pass   # Timings are optional
+
 
 if __name__ == "__main__":
     main()
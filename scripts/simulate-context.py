@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Memento - Context Simulator
+"How am I supposed to heal if I can't feel time?" — Replay a session before living it.
+
+Replays a scripted sequence of context events (file @-mentions, skill
+invocations, tool outputs, messages) against the project baseline and a
+token budget, modelling auto-compaction, and reports when and why the
+context limit is hit.
+
+Event files are JSON arrays or JSONL, one event per entry:
+    {"type": "mention", "file": "src/api/routes.ts"}
+    {"type": "skill", "name": "token-estimation"}
+    {"type": "tool_output", "tokens": 4000}           (or "bytes": 16000)
+    {"type": "message", "tokens": 800, "repeat": 20}
+
+File and skill sizes are counted once up front; the replay itself is a loop
+over integers, so a scenario can be swept over many budgets cheaply.
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+# Import token counting from sibling module
+SCRIPT_DIR = Path(__file__).parent
+
+try:
+    from importlib.util import spec_from_loader, module_from_spec
+    from importlib.machinery import SourceFileLoader
+
+    count_tokens_path = SCRIPT_DIR / "count-tokens.py"
+    spec = spec_from_loader("count_tokens", SourceFileLoader("count_tokens", str(count_tokens_path)))
+    count_tokens_module = module_from_spec(spec)
+    spec.loader.exec_module(count_tokens_module)
+except Exception:
+    count_tokens_module = None
+
+EVENT_TYPES = ("mention", "skill", "tool_output", "message")
+
+DEFAULT_BUDGET = 200000
+# Auto-compaction triggers at this fraction of the budget...
+DEFAULT_COMPACT_THRESHOLD = 0.9
+# ...and keeps this fraction of the conversation (everything above baseline)
+DEFAULT_COMPACT_KEEP = 0.2
+
+
+def load_events(path: str) -> list[dict]:
+    """Load events from a JSON array or JSONL file ("-" for stdin)."""
+    text = sys.stdin.read() if path == "-" else Path(path).expanduser().read_text(encoding="utf-8")
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        return json.loads(stripped)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def find_skill(name: str, root: Path) -> Optional[str]:
+    """Locate a skill's SKILL.md by its directory name."""
+    for skills_dir in (root / ".claude" / "skills", Path.home() / ".claude" / "skills"):
+        candidate = skills_dir / name / "SKILL.md"
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+def file_tokens(path: str, cache: dict) -> int:
+    """Token count of a file, computed once per path.
+
+    Raises ValueError if the file is missing or cannot be read, rather than
+    replaying it as an empty file.
+    """
+    if path not in cache:
+        analysis = count_tokens_module.analyze_file(path)
+        if "error" in analysis:
+            raise ValueError(f"{path}: {analysis['error']}")
+        cache[path] = analysis["tokens"]
+    return cache[path]
+
+
+def event_int(event: dict, key: str, default: Optional[int] = None) -> int:
+    """An integer field of an event; ValueError names the field if it is not one."""
+    value = event.get(key, default)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{event.get('type')} event: {key!r} must be a number, got {value!r}") from None
+
+
+def compile_events(events: list[dict], root: Path) -> tuple[list[int], list[int], list[str]]:
+    """Resolve events to parallel (sizes, type indexes, labels) lists.
+
+    repeat is expanded here so the replay loop never touches dicts.
+    """
+    cache = {}
+    sizes = []
+    kinds = []
+    labels = []
+
+    for event in events:
+        if not isinstance(event, dict):
+            raise ValueError(f"event must be an object, got {event!r}")
+        kind = event.get("type")
+        if kind not in EVENT_TYPES:
+            raise ValueError(f"unknown event type: {kind!r}")
+
+        if "tokens" in event:
+            size = event_int(event, "tokens")
+            label = event.get("label") or kind
+        elif "bytes" in event:
+            size = event_int(event, "bytes") // 4  # ~4 bytes per token
+            label = event.get("label") or kind
+        elif kind == "mention":
+            # ~ is expanded first; an absolute path then replaces root
+            path = str(root / Path(event["file"]).expanduser())
+            size = file_tokens(path, cache)
+            label = event.get("label") or f"@{event['file']}"
+        elif kind == "skill":
+            path = event.get("file") or find_skill(event["name"], root)
+            if path is None:
+                raise ValueError(f"skill not found: {event.get('name')!r}")
+            size = file_tokens(str(root / Path(path).expanduser()), cache)
+            label = event.get("label") or f"skill:{event.get('name') or path}"
+        else:
+            raise ValueError(f"{kind} event needs 'tokens' or 'bytes'")
+
+        for _ in range(event_int(event, "repeat", 1)):
+            sizes.append(size)
+            kinds.append(EVENT_TYPES.index(kind))
+            labels.append(label)
+
+    return sizes, kinds, labels
+
+
+def simulate(sizes: list[int], baseline: int, budget: int,
+             compact_threshold: Optional[float] = DEFAULT_COMPACT_THRESHOLD,
+             compact_keep: float = DEFAULT_COMPACT_KEEP,
+             timeline: bool = False) -> dict:
+    """Replay event sizes against a budget.
+
+    Returns the index of the event that hit the limit (or None), the indexes
+    at which auto-compaction ran, the peak fill and optionally the fill after
+    every event. compact_threshold=None disables auto-compaction.
+    """
+    fill = baseline
+    peak = baseline
+    limit_index = None
+    compactions = []
+    fills = [] if timeline else None
+    threshold = budget * compact_threshold if compact_threshold else None
+
+    for i, size in enumerate(sizes):
+        fill += size
+        if fill > peak:
+            peak = fill
+        if fill > budget:
+            limit_index = i
+            if fills is not None:
+                fills.append(fill)
+            break
+        if threshold is not None and fill >= threshold:
+            compactions.append((i, fill))
+            fill = baseline + int((fill - baseline) * compact_keep)
+        if fills is not None:
+            fills.append(fill)
+
+    return {
+        "limit_index": limit_index,
+        "compactions": compactions,
+        "peak": peak,
+        "final": fill,
+        "fills": fills
+    }
+
+
+def describe(run: dict, sizes: list[int], kinds: list[int], labels: list[str],
+             baseline: int, budget: int, compact_threshold: Optional[float]) -> dict:
+    """Turn a raw simulation run into a report with reasons."""
+    limit = None
+    if run["limit_index"] is not None:
+        i = run["limit_index"]
+        before = run["final"] - sizes[i]
+        limit = {
+            "event": i,
+            "type": EVENT_TYPES[kinds[i]],
+            "label": labels[i],
+            "tokens": sizes[i],
+            "fill_before": before,
+            "reason": f"{labels[i]} added {sizes[i]:,} tokens with {budget - before:,} remaining"
+        }
+
+    compactions = [
+        {
+            "event": i,
+            "label": labels[i],
+            "fill": fill,
+            "reason": f"fill {fill:,} crossed auto-compact threshold {int(budget * compact_threshold):,}"
+        }
+        for i, fill in run["compactions"]
+    ]
+
+    processed = len(sizes) if run["limit_index"] is None else run["limit_index"] + 1
+    by_type = {}
+    for i in range(processed):
+        name = EVENT_TYPES[kinds[i]]
+        by_type[name] = by_type.get(name, 0) + sizes[i]
+
+    report = {
+        "budget": budget,
+        "baseline": baseline,
+        "events": len(sizes),
+        "events_processed": processed,
+        "limit_hit": limit,
+        "compactions": compactions,
+        "peak_tokens": run["peak"],
+        "final_tokens": run["final"],
+        "tokens_by_type": by_type
+    }
+    if run["fills"] is not None:
+        report["timeline"] = [
+            {"event": i, "label": labels[i], "fill": fill}
+            for i, fill in enumerate(run["fills"])
+        ]
+    return report
+
+
+def parse_list(value: Optional[str], cast) -> Optional[list]:
+    """Parse a comma-separated CLI list."""
+    if not value:
+        return None
+    return [cast(item) for item in value.split(",") if item.strip()]
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Context Simulator"
+    )
+    parser.add_argument(
+        "events",
+        help="Event file (JSON array or JSONL, '-' for stdin)"
+    )
+    parser.add_argument(
+        "--project", "-p",
+        default=".",
+        help="Project root for baseline and relative paths (default: current directory)"
+    )
+    parser.add_argument(
+        "--budget", "-b",
+        type=int,
+        default=DEFAULT_BUDGET,
+        help=f"Context window budget in tokens (default: {DEFAULT_BUDGET})"
+    )
+    parser.add_argument(
+        "--baseline",
+        type=int,
+        default=None,
+        help="Override the starting baseline (default: analyze the project)"
+    )
+    parser.add_argument(
+        "--compact-threshold",
+        type=float,
+        default=DEFAULT_COMPACT_THRESHOLD,
+        help=f"Auto-compact at this fraction of the budget, 0 to disable (default: {DEFAULT_COMPACT_THRESHOLD})"
+    )
+    parser.add_argument(
+        "--compact-keep",
+        type=float,
+        default=DEFAULT_COMPACT_KEEP,
+        help=f"Fraction of the conversation kept by compaction (default: {DEFAULT_COMPACT_KEEP})"
+    )
+    parser.add_argument(
+        "--timeline", "-t",
+        action="store_true",
+        help="Include the fill level after every event"
+    )
+    parser.add_argument(
+        "--sweep-budgets",
+        default=None,
+        help="Comma-separated budgets to sweep, e.g. 100000,200000"
+    )
+    parser.add_argument(
+        "--sweep-thresholds",
+        default=None,
+        help="Comma-separated compaction thresholds to sweep, e.g. 0.8,0.9,0"
+    )
+
+    args = parser.parse_args()
+
+    if count_tokens_module is None:
+        print(json.dumps({"status": "error", "error": "count-tokens.py could not be loaded"}))
+        sys.exit(1)
+
+    root = Path(args.project).resolve()
+    try:
+        sizes, kinds, labels = compile_events(load_events(args.events), root)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(json.dumps({"status": "error", "error": str(e)}))
+        sys.exit(1)
+
+    baseline = args.baseline
+    if baseline is None:
+        baseline = count_tokens_module.analyze_project(str(root))["estimates"]["baseline_total"]
+
+    budgets = parse_list(args.sweep_budgets, int) or [args.budget]
+    thresholds = parse_list(args.sweep_thresholds, float) or [args.compact_threshold]
+
+    reports = []
+    started = time.perf_counter()
+    for budget in budgets:
+        for threshold in thresholds:
+            run = simulate(sizes, baseline, budget, threshold or None,
+                           args.compact_keep, args.timeline)
+            report = describe(run, sizes, kinds, labels, baseline, budget, threshold or None)
+            report["compact_threshold"] = threshold or None
+            reports.append(report)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    results = reports[0] if len(reports) == 1 else {"scenarios": reports}
+    results["events_per_ms"] = int(len(sizes) * len(reports) / max(elapsed_ms, 1e-6))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Memento - Trend Store
+"Memory can change the shape of a room." — Keep the long view, in bounded space.
+
+Keeps a compact per-project time series of session metrics in
+~/.claude/memento-trends.json. Recent points are stored raw; older points are
+folded into min/max/mean buckets (hour -> day -> week). Every tier is a
+capped array, so the file size and query cost are bounded by the number of
+buckets, not by the number of sessions ever logged.
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+TRENDS_FILE = Path.home() / ".claude" / "memento-trends.json"
+
+# (tier name, bucket width in seconds, max entries)
+TIERS = [
+    ("raw", None, 100),
+    ("hour", 3600, 168),     # One week of hourly buckets
+    ("day", 86400, 90),      # ~Three months of daily buckets
+    ("week", 604800, 156),   # ~Three years of weekly buckets
+]
+
+METRICS = ("baseline_tokens", "duration_minutes")
+
+# Baseline growth above this percentage triggers a regression alert
+DEFAULT_ALERT_THRESHOLD = 20.0
+# Number of previous raw points used as the regression reference
+ALERT_WINDOW = 10
+
+
+def load_trends() -> dict:
+    """Load existing trend store or create new structure."""
+    if TRENDS_FILE.exists():
+        try:
+            with open(TRENDS_FILE, 'r') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, IOError):
+            pass
+    return {"projects": {}, "version": "1.0"}
+
+
+def save_trends(data: dict) -> None:
+    """Save trend store compactly, creating directory if needed."""
+    TRENDS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(TRENDS_FILE, 'w') as f:
+        json.dump(data, f, separators=(",", ":"))
+
+
+def new_series() -> dict:
+    """Empty series with one array per tier."""
+    return {name: [] for name, _, _ in TIERS}
+
+
+def _fold(series: dict, tier: int, ts: int, count: int,
+          low: float, high: float, total: float) -> None:
+    """Fold an aggregate into tier, cascading overflow into coarser tiers.
+
+    Buckets are [start, count, min, max, sum]. Points arrive oldest first, so
+    only the newest bucket of a tier ever needs merging.
+    """
+    if tier >= len(TIERS):
+        return  # Fell off the coarsest tier
+
+    name, width, cap = TIERS[tier]
+    buckets = series.setdefault(name, [])
+    start = ts - ts % width
+
+    if buckets and buckets[-1][0] >= start:
+        bucket = buckets[-1]
+        bucket[1] += count
+        bucket[2] = min(bucket[2], low)
+        bucket[3] = max(bucket[3], high)
+        bucket[4] += total
+    else:
+        buckets.append([start, count, low, high, total])
+
+    if len(buckets) > cap:
+        old = buckets.pop(0)
+        _fold(series, tier + 1, old[0], old[1], old[2], old[3], old[4])
+
+
+def add_point(series: dict, value: float, ts: Optional[int] = None) -> None:
+    """Append a raw point, downsampling the oldest one when the raw tier is full."""
+    ts = int(time.time()) if ts is None else int(ts)
+    raw = series.setdefault("raw", [])
+    raw.append([ts, value])
+
+    if len(raw) > TIERS[0][2]:
+        old_ts, old_value = raw.pop(0)
+        _fold(series, 1, old_ts, 1, old_value, old_value, old_value)
+
+
+def record(project: str, metric: str, value: float, ts: Optional[int] = None) -> None:
+    """Record one metric value for a project and persist the store."""
+    data = load_trends()
+    project_series = data["projects"].setdefault(project, {})
+    series = project_series.setdefault(metric, new_series())
+    add_point(series, value, ts)
+    save_trends(data)
+
+
+def query(series: dict) -> list[dict]:
+    """Flatten a series into chronological points, coarsest data first."""
+    points = []
+    for name, width, _ in reversed(TIERS[1:]):
+        for start, count, low, high, total in series.get(name, []):
+            points.append({
+                "start": datetime.fromtimestamp(start).isoformat(),
+                "resolution": name,
+                "count": count,
+                "min": low,
+                "max": high,
+                "mean": round(total / count, 1)
+            })
+    for ts, value in series.get("raw", []):
+        points.append({
+            "start": datetime.fromtimestamp(ts).isoformat(),
+            "resolution": "raw",
+            "count": 1,
+            "min": value,
+            "max": value,
+            "mean": value
+        })
+    return points
+
+
+def check_regression(series: dict, threshold: float = DEFAULT_ALERT_THRESHOLD) -> Optional[dict]:
+    """Compare the latest point against the mean of the points before it.
+
+    Returns an alert dict when the latest value exceeds the reference by more
+    than threshold percent, otherwise None.
+    """
+    raw = series.get("raw", [])
+    if not raw:
+        return None
+
+    latest_ts, latest = raw[-1]
+    previous = [value for _, value in raw[-1 - ALERT_WINDOW:-1]]
+    if previous:
+        reference = sum(previous) / len(previous)
+    else:
+        # Only one raw point left: compare against the newest bucket
+        for name, _, _ in TIERS[1:]:
+            if series.get(name):
+                _, count, _, _, total = series[name][-1]
+                reference = total / count
+                break
+        else:
+            return None
+
+    if reference <= 0:
+        return None
+
+    change = (latest - reference) / reference * 100
+    if change <= threshold:
+        return None
+
+    return {
+        "latest": latest,
+        "reference": round(reference, 1),
+        "change_percent": round(change, 1),
+        "at": datetime.fromtimestamp(latest_ts).isoformat()
+    }
+
+
+def find_alerts(data: dict, metric: str = "baseline_tokens",
+                threshold: float = DEFAULT_ALERT_THRESHOLD) -> list[dict]:
+    """Regression alerts for every project tracking metric."""
+    alerts = []
+    for project, metrics in data.get("projects", {}).items():
+        if metric in metrics:
+            alert = check_regression(metrics[metric], threshold)
+            if alert:
+                alert["project"] = project
+                alert["metric"] = metric
+                alerts.append(alert)
+    return alerts
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Memento - Trend Store"
+    )
+    parser.add_argument(
+        "--project", "-p",
+        default=None,
+        help="Project name to show (default: all projects)"
+    )
+    parser.add_argument(
+        "--metric", "-m",
+        default="baseline_tokens",
+        choices=METRICS,
+        help="Metric to show (default: baseline_tokens)"
+    )
+    parser.add_argument(
+        "--alerts", "-a",
+        action="store_true",
+        help="Only report baseline regression alerts"
+    )
+    parser.add_argument(
+        "--threshold", "-t",
+        type=float,
+        default=DEFAULT_ALERT_THRESHOLD,
+        help=f"Regression alert threshold in percent (default: {DEFAULT_ALERT_THRESHOLD:g})"
+    )
+
+    args = parser.parse_args()
+    data = load_trends()
+
+    alerts = find_alerts(data, args.metric, args.threshold)
+    if args.project:
+        alerts = [a for a in alerts if a["project"] == args.project]
+
+    if args.alerts:
+        results = {"alerts": alerts}
+    else:
+        projects = data.get("projects", {})
+        names = [args.project] if args.project else sorted(projects)
+        results = {
+            "metric": args.metric,
+            "projects": {
+                name: query(projects.get(name, {}).get(args.metric, {}))
+                for name in names
+            },
+            "alerts": alerts
+        }
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
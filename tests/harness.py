@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+Accuracy and throughput harness for count-tokens.py estimators.
+
+Generates a deterministic corpus (code in several languages, JSON, Markdown,
+CJK, emoji, minified JS, large logs), imports the scripts once, and measures every
+estimator per file type against tiktoken (when installed) plus its
+throughput. Cases run in parallel worker processes.
+
+Run with: python3 tests/harness.py [--files-per-type N] [--workers N]
+"""
+
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+SCRIPT_PATH = Path(__file__).parent.parent / "scripts" / "count-tokens.py"
+
+# Mean relative error tolerated for the checked estimator, per file type,
+# before the harness fails (only checked when tiktoken is available)
+DEFAULT_MAX_ERROR = 0.05
+DEFAULT_CHECK = "count_tokens_bounded"
+
+IDENTIFIERS = [
+    "user", "config", "handler", "request", "response", "value", "index", "items",
+    "result", "context", "buffer", "client", "session", "token", "parser", "cache",
+]
+WORDS = [
+    "the", "context", "window", "token", "budget", "session", "memory", "file",
+    "project", "skill", "command", "agent", "remember", "polaroid", "tattoo", "facts",
+]
+CJK = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处队南给色光门即保治北造百规热领七海口东导器压志世金增争济阶油思术极交受联什认六共权收证改清己美再采转更单风切打白教速花带安场身车例真务具万每目至达走积示议声报斗完类八离华名确才科张信马节话米整空元况今集温传土许步群广石记需段研界拉林律叫且究观越织装影算低持音众书布复容儿须际商非验连断深难近矿千周委素技备半办青省列习响约支般史感劳便团往酸历市克何除消构府称太准精值号率族维划选标写存候毛亲快效斯院查江型眼王按格养易置派层片始却专状育厂京识适属圆包火住调满县局照参红细引听该铁价严"
+EMOJI = "😀😃😄😁😆😅😂🤣🥲☺️😊😇🙂🙃😉😌😍🥰😘😗😙😚😋😛😝😜🤪🤨🧐🤓😎🥸🤩🥳😏😒🚀🔥✨🎉👍👀💡⚠️✅❌📊📁🧠"
+
+
+def gen_python(rng: random.Random) -> str:
+    lines = ["import os", "import json", ""]
+    for _ in range(rng.randint(3, 12)):
+        name = "_".join(rng.sample(IDENTIFIERS, 2))
+        args = ", ".join(rng.sample(IDENTIFIERS, rng.randint(1, 3)))
+        lines.append(f"def {name}({args}):")
+        lines.append(f'    """Return the {rng.choice(WORDS)} for {rng.choice(WORDS)}."""')
+        for _ in range(rng.randint(2, 8)):
+            a, b = rng.sample(IDENTIFIERS, 2)
+            lines.append(f"    {a} = {b}.get('{rng.choice(WORDS)}', {rng.randint(0, 999)})")
+        lines.append(f"    return {rng.choice(IDENTIFIERS)}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def gen_javascript(rng: random.Random) -> str:
+    lines = ["'use strict';", ""]
+    for _ in range(rng.randint(3, 12)):
+        name = rng.choice(IDENTIFIERS) + rng.choice(IDENTIFIERS).title()
+        lines.append(f"export async function {name}({', '.join(rng.sample(IDENTIFIERS, 2))}) {{")
+        for _ in range(rng.randint(2, 8)):
+            a, b = rng.sample(IDENTIFIERS, 2)
+            lines.append(f"  const {a}{rng.randint(0, 9)} = await {b}.fetch(`/api/${{{a}}}/{rng.choice(WORDS)}`);")
+        lines.append(f"  return {{ {', '.join(rng.sample(IDENTIFIERS, 3))} }};")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def gen_minified_js(rng: random.Random) -> str:
+    return gen_javascript(rng).replace("\n", "").replace("  ", "").replace(" = ", "=").replace(", ", ",")
+
+
+def gen_go(rng: random.Random) -> str:
+    lines = ["package main", "", 'import "fmt"', ""]
+    for _ in range(rng.randint(3, 10)):
+        name = rng.choice(IDENTIFIERS).title() + rng.choice(IDENTIFIERS).title()
+        lines.append(f"func {name}({rng.choice(IDENTIFIERS)} string, n int) (int, error) {{")
+        for _ in range(rng.randint(2, 6)):
+            lines.append(f'\tif n > {rng.randint(1, 99)} {{ return 0, fmt.Errorf("{rng.choice(WORDS)}: %d", n) }}')
+        lines.append("\treturn n, nil")
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def gen_rust(rng: random.Random) -> str:
+    lines = ["use std::collections::HashMap;", ""]
+    for _ in range(rng.randint(3, 10)):
+        name = "_".join(rng.sample(IDENTIFIERS, 2))
+        lines.append(f"pub fn {name}(map: &mut HashMap<String, u64>) -> Option<u64> {{")
+        for _ in range(rng.randint(2, 6)):
+            lines.append(f'    map.insert("{rng.choice(WORDS)}".to_string(), {rng.randint(0, 9999)});')
+        lines.append(f'    map.get("{rng.choice(WORDS)}").copied()')
+        lines.append("}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def gen_json(rng: random.Random) -> str:
+    data = [
+        {
+            "id": rng.randint(1, 10 ** 6),
+            "name": " ".join(rng.sample(WORDS, 3)),
+            "tags": rng.sample(IDENTIFIERS, 3),
+            "score": round(rng.random() * 100, 3),
+            "active": rng.random() > 0.5,
+        }
+        for _ in range(rng.randint(5, 40))
+    ]
+    return json.dumps(data, indent=2)
+
+
+def gen_markdown(rng: random.Random) -> str:
+    lines = [f"# {' '.join(rng.sample(WORDS, 3)).title()}", ""]
+    for _ in range(rng.randint(3, 10)):
+        lines.append(f"## {' '.join(rng.sample(WORDS, 2)).title()}")
+        lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))) + ".")
+        lines.append(f"- `{rng.choice(IDENTIFIERS)}` — {' '.join(rng.sample(WORDS, 4))}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def gen_cjk(rng: random.Random) -> str:
+    return "\n".join(
+        "".join(rng.choice(CJK) for _ in range(rng.randint(20, 80))) + "。"
+        for _ in range(rng.randint(5, 30))
+    )
+
+
+def gen_emoji(rng: random.Random) -> str:
+    return "\n".join(
+        " ".join(rng.choice(WORDS) + rng.choice(EMOJI) for _ in range(rng.randint(5, 20)))
+        for _ in range(rng.randint(5, 30))
+    )
+
+
+def gen_large_log(rng: random.Random) -> str:
+    """Tool-output sized text (100-300 KB) that exercises sampled estimation."""
+    lines = []
+    size = 0
+    target = rng.randint(100_000, 300_000)
+    while size < target:
+        line = (f"2026-01-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00 "
+                f"{rng.choice(['INFO', 'WARN', 'DEBUG', 'ERROR'])} {rng.choice(IDENTIFIERS)}: "
+                + " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 16))))
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines)
+
+
+GENERATORS = {
+    "python": (".py", gen_python),
+    "javascript": (".js", gen_javascript),
+    "minified_js": (".min.js", gen_minified_js),
+    "go": (".go", gen_go),
+    "rust": (".rs", gen_rust),
+    "json": (".json", gen_json),
+    "markdown": (".md", gen_markdown),
+    "cjk": (".txt", gen_cjk),
+    "emoji": (".txt", gen_emoji),
+    "large_log": (".log", gen_large_log),
+}
+
+
+def generate_corpus(files_per_type: int, seed: int = 0) -> list[tuple[str, str, str]]:
+    """Deterministic corpus of (file type, name, text)."""
+    corpus = []
+    for file_type, (suffix, generate) in GENERATORS.items():
+        rng = random.Random(f"{seed}:{file_type}")
+        for i in range(files_per_type):
+            corpus.append((file_type, f"{file_type}-{i:04d}{suffix}", generate(rng)))
+    return corpus
+
+
+def load_script():
+    """Import count-tokens.py as a module."""
+    from importlib.util import spec_from_loader, module_from_spec
+    from importlib.machinery import SourceFileLoader
+
+    spec = spec_from_loader("count_tokens", SourceFileLoader("count_tokens", str(SCRIPT_PATH)))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Per-process module, loaded once by the pool initializer
+count_tokens = None
+
+
+def init_worker() -> None:
+    global count_tokens
+    count_tokens = load_script()
+
+
+def estimators() -> dict:
+    """Estimators under test, keyed by name. Add new estimators here."""
+    return {
+        "chars_div_4": lambda text: len(text) // 4,
+        "count_tokens": count_tokens.count_tokens,
+        "count_tokens_bounded": lambda text: count_tokens.count_tokens_bounded(text)[0],
+    }
+
+
+def reference_tokens(text: str):
+    """Exact cl100k_base count, or None without tiktoken."""
+    if not count_tokens.TIKTOKEN_AVAILABLE:
+        return None
+    return len(count_tokens.get_encoder().encode(text))
+
+
+def run_case(case: tuple[str, str, str]) -> dict:
+    """Measure all estimators on one corpus file."""
+    file_type, name, text = case
+    result = {"type": file_type, "name": name, "chars": len(text),
+              "reference": reference_tokens(text), "estimates": {}, "seconds": {}}
+    for est_name, estimate in estimators().items():
+        started = time.perf_counter()
+        result["estimates"][est_name] = estimate(text)
+        result["seconds"][est_name] = time.perf_counter() - started
+    return result
+
+
+def summarize(results: list[dict]) -> dict:
+    """Per file type and estimator: mean/max relative error, bias, throughput."""
+    summary = {}
+    for r in results:
+        type_summary = summary.setdefault(r["type"], {"files": 0, "chars": 0, "estimators": {}})
+        type_summary["files"] += 1
+        type_summary["chars"] += r["chars"]
+        for est_name, estimate in r["estimates"].items():
+            stats = type_summary["estimators"].setdefault(
+                est_name, {"errors": [], "tokens": 0, "seconds": 0.0})
+            stats["tokens"] += estimate
+            stats["seconds"] += r["seconds"][est_name]
+            if r["reference"]:
+                stats["errors"].append((estimate - r["reference"]) / r["reference"])
+
+    for type_summary in summary.values():
+        for stats in type_summary["estimators"].values():
+            errors = stats.pop("errors")
+            seconds = stats.pop("seconds")
+            stats["chars_per_sec"] = int(type_summary["chars"] / max(seconds, 1e-9))
+            if errors:
+                stats["mean_abs_error"] = round(sum(abs(e) for e in errors) / len(errors), 3)
+                stats["max_abs_error"] = round(max(abs(e) for e in errors), 3)
+                stats["bias"] = round(sum(errors) / len(errors), 3)
+    return summary
+
+
+def write_corpus(corpus: list[tuple[str, str, str]], directory: Path) -> None:
+    """Write the corpus to disk, e.g. for running count-tokens.py on it."""
+    for file_type, name, text in corpus:
+        path = directory / file_type / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def main():
+    """CLI entry point."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memento estimator accuracy/throughput harness")
+    parser.add_argument("--files-per-type", "-n", type=int, default=50,
+                        help="Generated files per file type (default: 50)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1,
+                        help="Parallel worker processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus seed (default: 0)")
+    parser.add_argument("--check", default=DEFAULT_CHECK,
+                        help=f"Estimator held to --max-error (default: {DEFAULT_CHECK})")
+    parser.add_argument("--max-error", type=float, default=DEFAULT_MAX_ERROR,
+                        help=f"Fail if the checked estimator's mean error exceeds this (default: {DEFAULT_MAX_ERROR})")
+    parser.add_argument("--write-corpus", metavar="DIR", default=None,
+                        help="Also write the generated corpus to DIR")
+    parser.add_argument("--json", "-j", action="store_true", help="Output raw JSON")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.files_per_type, args.seed)
+    if args.write_corpus:
+        write_corpus(corpus, Path(args.write_corpus))
+
+    started = time.perf_counter()
+    if args.workers > 1:
+        with ProcessPoolExecutor(args.workers, initializer=init_worker) as pool:
+            results = list(pool.map(run_case, corpus, chunksize=max(len(corpus) // (args.workers * 4), 1)))
+    else:
+        init_worker()
+        results = [run_case(case) for case in corpus]
+    elapsed = time.perf_counter() - started
+
+    init_worker()
+    summary = summarize(results)
+    report = {
+        "tiktoken_available": count_tokens.TIKTOKEN_AVAILABLE,
+        "files": len(corpus),
+        "workers": args.workers,
+        "elapsed_seconds": round(elapsed, 3),
+        "types": summary,
+    }
+
+    failures = [
+        file_type for file_type, type_summary in summary.items()
+        if type_summary["estimators"].get(args.check, {}).get("mean_abs_error", 0) > args.max_error
+    ]
+
+    if args.json:
+        report["failures"] = failures
+        print(json.dumps(report, indent=2))
+    else:
+        print("=" * 78)
+        print("Memento Estimator Harness")
+        print("=" * 78)
+        print(f"tiktoken available: {report['tiktoken_available']}  "
+              f"files: {report['files']}  workers: {args.workers}  time: {report['elapsed_seconds']}s")
+        if not report["tiktoken_available"]:
+            print("(install tiktoken to measure accuracy; showing throughput only)")
+        print("-" * 78)
+        print(f"{'type':<12} {'estimator':<22} {'mean err':>9} {'max err':>9} {'bias':>8} {'chars/s':>14}")
+        for file_type, type_summary in summary.items():
+            for est_name, stats in type_summary["estimators"].items():
+                print(f"{file_type:<12} {est_name:<22} "
+                      f"{stats.get('mean_abs_error', '-'):>9} {stats.get('max_abs_error', '-'):>9} "
+                      f"{stats.get('bias', '-'):>8} {stats['chars_per_sec']:>14,}")
+        print("=" * 78)
+        if failures:
+            print(f"{args.check} exceeds {args.max_error:.0%} mean error for: {', '.join(failures)}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
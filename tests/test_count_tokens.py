@@ -55,15 +55,39 @@ class TestResult:
         return f"[{status}] {self.name}: {self.message}"
 
 
-def run_script(args: list) -> dict:
-    """Run count-tokens.py with given arguments and return parsed JSON output."""
-    cmd = [sys.executable, str(SCRIPT_PATH), "--json"] + args
-    result = subprocess.run(cmd, capture_output=True, text=True)
+def load_script():
+    """Import count-tokens.py once as a module."""
+    from importlib.util import spec_from_loader, module_from_spec
+    from importlib.machinery import SourceFileLoader
 
-    if result.returncode != 0:
-        raise RuntimeError(f"Script failed: {result.stderr}")
+    spec = spec_from_loader("count_tokens", SourceFileLoader("count_tokens", str(SCRIPT_PATH)))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
 
-    return json.loads(result.stdout)
+
+count_tokens = load_script()
+
+
+def run_script(args: list, jsonl: bool = False):
+    """Run count-tokens.py's CLI in-process and return parsed JSON output.
+
+    With jsonl=True, returns the list of parsed output lines.
+    """
+    import contextlib
+    import io
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            count_tokens.main(["--json"] + args)
+    except SystemExit as e:
+        raise RuntimeError(f"Script failed ({e.code}): {stderr.getvalue()}")
+
+    if jsonl:
+        return [json.loads(line) for line in stdout.getvalue().splitlines()]
+    return json.loads(stdout.getvalue())
 
 
 def test_file_token_count(filename: str, tiktoken_available: bool) -> TestResult:
@@ -289,6 +313,204 @@ def test_estimation_mode_accuracy() -> TestResult:
     return result
 
 
+def test_token_stream_chunking() -> TestResult:
+    """Test that a streamed count does not depend on how the stream is chunked."""
+    result = TestResult("Token stream chunking")
+
+    try:
+        text = "abcdefg" * (2_000_000 // 7)
+        counts = set()
+        for size in (7, 1000, 65536, len(text)):
+            stream = count_tokens.TokenStream(counter=count_tokens.estimate_tokens)
+            for i in range(0, len(text), size):
+                stream.feed(text[i:i + size])
+            counts.add(stream.count())
+
+        expected = len(text) // 4
+        if len(counts) == 1 and abs(counts.pop() - expected) <= expected * 0.01:
+            result.passed = True
+            result.message = f"same estimate for 7-char to whole-text chunks (~{expected} tokens)"
+        else:
+            result.message = f"counts {sorted(counts)}, expected ~{expected}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_git_diff() -> TestResult:
+    """Test --diff reports per-component deltas for changed files only."""
+    import tempfile
+    result = TestResult("Git diff deltas")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            git = ["git", "-C", tmp, "-c", "user.name=memento", "-c", "user.email=memento@example.com"]
+            subprocess.run(git + ["init", "-q"], check=True)
+            (root / "CLAUDE.md").write_text("one two three\n")
+            (root / "unrelated.txt").write_text("not a config file\n")
+            skill = root / ".claude" / "skills" / "résumé" / "SKILL.md"
+            skill.parent.mkdir(parents=True)
+            skill.write_text("write a résumé\n")
+            (root / ".claude" / "commands").mkdir()
+            (root / ".claude" / "commands" / "old.md").write_text("run the old command\n")
+            subprocess.run(git + ["add", "."], check=True)
+            subprocess.run(git + ["commit", "-qm", "init"], check=True)
+
+            (root / "CLAUDE.md").write_text("one two three four five six seven eight\n")
+            (root / "unrelated.txt").write_text("still not a config file\n")
+            skill.write_text("write a résumé and a cover letter\n")
+            subprocess.run(git + ["mv", ".claude/commands/old.md", ".claude/commands/new.md"], check=True)
+
+            output = run_script(["--project", tmp, "--diff", "HEAD"])
+            status = {f["file"]: f["status"] for f in output["files"]}
+            delta = output["deltas"]["claude_md_tokens"]
+            expected = {
+                "CLAUDE.md": "modified",
+                ".claude/skills/résumé/SKILL.md": "modified",
+                ".claude/commands/old.md": "deleted",
+                ".claude/commands/new.md": "added",
+            }
+
+            with tempfile.TemporaryDirectory() as plain:
+                not_git = run_script(["--project", plain, "--diff", "HEAD"])
+
+            if (status == expected and delta > 0 and output["deltas"]["skills_tokens"] > 0
+                    and output["deltas"]["commands_tokens"] == 0
+                    and not_git.get("error", "").startswith("not a git work tree")):
+                result.passed = True
+                result.message = (f"CLAUDE.md delta=+{delta} tokens, non-ASCII skill and rename "
+                                  f"reported, unrelated files skipped, non-git project refused")
+            else:
+                result.message = (f"unexpected diff output: files={status}, deltas={output['deltas']}, "
+                                  f"non-git error={not_git.get('error')!r}")
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_resource_guard() -> TestResult:
+    """Test that --max-file-bytes estimates oversized files and marks results truncated.
+
+    Also checks that the CLI applies the default limit and that 0 disables it.
+    """
+    result = TestResult("Resource guard")
+
+    try:
+        big = str(KNOWN_SIZES_PATH / "simple-markdown.md")
+        small = str(KNOWN_SIZES_PATH / "single-word.txt")
+        output = run_script([big, small, "--max-file-bytes", "100"])
+        big_data, small_data = output["files"]
+
+        # The CLI guards by default; 0 turns a limit off
+        default = count_tokens.DEFAULT_MAX_FILE_BYTES
+        count_tokens.DEFAULT_MAX_FILE_BYTES = 100
+        try:
+            guarded = run_script([big])
+            unguarded = run_script([big, "--max-file-bytes", "0"])
+        finally:
+            count_tokens.DEFAULT_MAX_FILE_BYTES = default
+
+        if (output.get("truncated") is True
+                and big_data.get("guard") == "max_file_bytes"
+                and big_data["tokens"] == big_data["bytes"] // 4
+                and "guard" not in small_data
+                and guarded["files"][0].get("guard") == "max_file_bytes"
+                and unguarded.get("truncated") is not True
+                and "guard" not in unguarded["files"][0]):
+            result.passed = True
+            result.message = f"oversized file estimated from size ({big_data['tokens']} tokens)"
+        else:
+            result.message = f"unexpected output: {output}, {guarded}, {unguarded}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_skills_deadline() -> TestResult:
+    """Test that the skills walk stops at the deadline and still lists unvisited skills."""
+    import tempfile
+
+    result = TestResult("Skills walk deadline")
+
+    class CountdownGuard(count_tokens.ResourceGuard):
+        """Expires after a fixed number of checks instead of wall-clock time."""
+
+        def __init__(self, checks: int):
+            super().__init__()
+            self.checks = checks
+
+        def expired(self) -> bool:
+            self.checks -= 1
+            if self.checks < 0:
+                self.tripped.add("deadline")
+                return True
+            return False
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            skills_dir = Path(tmp) / "skills"
+            for i in range(10):
+                (skills_dir / f"skill-{i}" / "refs").mkdir(parents=True)
+                (skills_dir / f"skill-{i}" / "SKILL.md").write_text("# Skill\n")
+
+            # Enough checks to list skills_dir itself, none for its subdirectories
+            guard = CountdownGuard(11)
+            found = []
+            unvisited = count_tokens.find_skills(skills_dir, found, guard)
+
+        if len(found) == 10 and unvisited == 10 and guard.tripped == {"deadline"}:
+            result.passed = True
+            result.message = "10 skills found by stat in 10 unvisited directories"
+        else:
+            result.message = f"found {len(found)}, unvisited {unvisited}, tripped {guard.tripped}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_output_shaping() -> TestResult:
+    """Test --top, --fields, --summary-only and --jsonl output modes."""
+    result = TestResult("Output shaping")
+
+    try:
+        paths = [str(KNOWN_SIZES_PATH / name) for name in EXPECTED_METADATA]
+        full = run_script(paths)
+        largest = max(full["files"], key=lambda f: f["tokens"])
+
+        top = run_script(paths + ["--top", "1", "--fields", "files.file,total_tokens"])
+        summary = run_script(paths + ["--summary-only"])
+        lines = run_script(paths + ["--jsonl", "--fields", "file,tokens"], jsonl=True)
+        rejected = []
+        for value in ("0", "-1"):
+            try:
+                run_script(paths + ["--top", value])
+            except RuntimeError:
+                rejected.append(value)
+
+        checks = [
+            top == {"files": [{"file": largest["file"]}], "total_tokens": full["total_tokens"]},
+            "files" not in summary and summary["total_tokens"] == full["total_tokens"],
+            len(lines) == len(paths) + 1,
+            all(set(line) == {"file", "tokens"} for line in lines[:-1]),
+            lines[-1]["summary"]["total_tokens"] == full["total_tokens"],
+            rejected == ["0", "-1"],
+        ]
+        if all(checks):
+            result.passed = True
+            result.message = f"top file {Path(largest['file']).name}, {len(lines)} JSONL lines"
+        else:
+            result.message = f"checks failed: {checks}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
 def run_tests():
     """Run all tests and report results."""
     print("=" * 60)
@@ -359,6 +581,32 @@ def run_tests():
     results.append(r)
     print(r)
 
+    # Test 8: Git diff
+    print("\n[Git Diff Tests]")
+    r = test_git_diff()
+    results.append(r)
+    print(r)
+
+    print("\n[Token Stream Tests]")
+    r = test_token_stream_chunking()
+    results.append(r)
+    print(r)
+
+    # Test 9: Resource guards
+    print("\n[Resource Guard Tests]")
+    r = test_resource_guard()
+    results.append(r)
+    print(r)
+    r = test_skills_deadline()
+    results.append(r)
+    print(r)
+
+    # Test 10: Output modes
+    print("\n[Output Shaping Tests]")
+    r = test_output_shaping()
+    results.append(r)
+    print(r)
+
     # Summary
     print("\n" + "=" * 60)
     passed = sum(1 for r in results if r.passed)
@@ -0,0 +1,643 @@
+#!/usr/bin/env python3
+"""
+Test suite for the logging and analysis scripts besides count-tokens.py
+
+Each script is imported once as a module and exercised against temporary
+files, never the real ~/.claude data.
+Run with: python3 tests/test_scripts.py
+"""
+
+import io
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from test_count_tokens import TestResult
+
+SCRIPTS_PATH = Path(__file__).parent.parent / "scripts"
+
+
+def load_script(filename: str, module_name: str):
+    """Import a hyphenated script as a module."""
+    from importlib.util import spec_from_loader, module_from_spec
+    from importlib.machinery import SourceFileLoader
+
+    spec = spec_from_loader(module_name, SourceFileLoader(module_name, str(SCRIPTS_PATH / filename)))
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+command_log = load_script("command-log.py", "command_log")
+forecast_session = load_script("forecast-session.py", "forecast_session")
+export_metrics = load_script("export-metrics.py", "export_metrics")
+hook_payload = load_script("hook-payload.py", "hook_payload")
+simulate_context = load_script("simulate-context.py", "simulate_context")
+command_stats = load_script("command-stats.py", "command_stats")
+trend_store = load_script("trend-store.py", "trend_store")
+log_command = load_script("log-command.py", "log_command")
+
+
+def test_command_log_round_trip() -> TestResult:
+    """Test that entries survive JSON -> binary -> JSON unchanged."""
+    result = TestResult("Binary log round trip")
+
+    try:
+        start = datetime(2026, 1, 1, 9, 30)
+        commands = [
+            {"command": "git status", "project": "alpha", "timestamp": start.isoformat()},
+            {"command": "npm test", "project": "beta",
+             "timestamp": (start + timedelta(seconds=5)).isoformat(), "output_tokens": 1234},
+            {"command": "git status", "project": "alpha",
+             "timestamp": (start + timedelta(minutes=1)).isoformat()},
+            {"command": "echo 'héllo ✓'", "project": "alpha",
+             "timestamp": (start + timedelta(minutes=2)).isoformat()},
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "commands.json"
+            binary_path = Path(tmp) / "commands.bin"
+            back_path = Path(tmp) / "back.json"
+            json_path.write_text(json.dumps({"commands": commands}))
+
+            command_log.json_to_binary(json_path, binary_path)
+            command_log.binary_to_json(binary_path, back_path)
+            back = json.loads(back_path.read_text())["commands"]
+
+        if back == commands:
+            result.passed = True
+            result.message = f"{len(back)} entries identical"
+        else:
+            result.message = f"got {back}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_command_log_bad_entry_keeps_log() -> TestResult:
+    """Test that converting JSON with a malformed entry leaves the binary log alone."""
+    result = TestResult("Binary log bad entry")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            json_path = Path(tmp) / "commands.json"
+            binary_path = Path(tmp) / "commands.bin"
+            with command_log.CommandLogWriter(binary_path) as writer:
+                writer.append("git status", "alpha")
+            json_path.write_text(json.dumps({"commands": [
+                {"command": "ls", "project": "alpha", "timestamp": "2026-01-01T09:00:00"},
+                {"command": "pwd", "project": "alpha"}
+            ]}))
+            try:
+                command_log.json_to_binary(json_path, binary_path)
+                error = None
+            except ValueError as e:
+                error = str(e)
+            kept = [e["command"] for e in command_log.iter_entries(binary_path)]
+
+        if error and "entry 1" in error and kept == ["git status"]:
+            result.passed = True
+            result.message = "ValueError raised, existing log kept"
+        else:
+            result.message = f"error {error!r}, log {kept}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_command_log_interleaved_writers() -> TestResult:
+    """Test that two writers open at once never share a string id."""
+    result = TestResult("Binary log interleaved writers")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "commands.bin"
+            first = command_log.CommandLogWriter(path)
+            second = command_log.CommandLogWriter(path)
+            first.append("rm -rf build", "alpha")
+            second.append("git status", "alpha")
+            first.append("git status", "beta")
+            second.append("rm -rf build", "beta")
+            first.close()
+            second.close()
+            got = [(e["command"], e["project"]) for e in command_log.iter_entries(path)]
+
+        expected = [("rm -rf build", "alpha"), ("git status", "alpha"),
+                    ("git status", "beta"), ("rm -rf build", "beta")]
+        if got == expected:
+            result.passed = True
+            result.message = "entries read back as written"
+        else:
+            result.message = f"got {got}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def _append_many(args: tuple) -> None:
+    path, worker = args
+    with command_log.CommandLogWriter(Path(path)) as writer:
+        for i in range(40):
+            writer.append(f"worker-{worker} cmd-{i % 4}", f"project-{worker}")
+
+
+def test_command_log_concurrent_processes() -> TestResult:
+    """Test that parallel writer processes keep every entry and string intact."""
+    result = TestResult("Binary log concurrent processes")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "commands.bin"
+            with multiprocessing.Pool(4) as pool:
+                pool.map(_append_many, [(str(path), w) for w in range(6)])
+            entries = list(command_log.iter_entries(path))
+
+        consistent = all(
+            e["command"].split()[0] == "worker-" + e["project"].split("-")[1]
+            for e in entries
+        )
+        if len(entries) == 240 and consistent:
+            result.passed = True
+            result.message = "240 entries from 6 processes, all consistent"
+        else:
+            result.message = f"{len(entries)} entries, consistent={consistent}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_command_log_torn_tail() -> TestResult:
+    """Test that a torn trailing record is dropped before the next append."""
+    result = TestResult("Binary log torn tail")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "commands.bin"
+            with command_log.CommandLogWriter(path) as writer:
+                writer.append("git status", "alpha")
+            with open(path, "ab") as f:
+                f.write(b"\x20\x00\x00\x00\x02partial")   # Interrupted write
+            with command_log.CommandLogWriter(path) as writer:
+                writer.append("ls", "alpha")
+            got = [e["command"] for e in command_log.iter_entries(path)]
+
+        if got == ["git status", "ls"]:
+            result.passed = True
+            result.message = "tail truncated, later entries readable"
+        else:
+            result.message = f"got {got}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_command_log_rotation() -> TestResult:
+    """Test that the log rotates at max_bytes and keeps its size bounded."""
+    result = TestResult("Binary log rotation")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "commands.bin"
+            with command_log.CommandLogWriter(path, max_bytes=512) as writer:
+                for i in range(200):
+                    writer.append(f"command {i}", "alpha")
+            files = command_log.log_files(path)
+            sizes = [f.stat().st_size for f in files]
+            last = [e["command"] for e in command_log.iter_entries(path)][-1]
+
+        if len(files) == 2 and max(sizes) < 512 + 64 and last == "command 199":
+            result.passed = True
+            result.message = f"rotated, file sizes {sizes}"
+        else:
+            result.message = f"files {files}, sizes {sizes}, last {last!r}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_output_cost_counter() -> TestResult:
+    """Test that Bash output is counted with the encoder when it is warm, else estimated."""
+    result = TestResult("Output cost counter")
+
+    count_tokens = log_command.count_tokens_module
+    saved = (count_tokens.TIKTOKEN_AVAILABLE, count_tokens._encoder, count_tokens.WARM_CACHE_FILE)
+
+    class WordEncoder:
+        """Stands in for a warm tiktoken encoder: one token per word."""
+
+        def encode(self, text):
+            return text.split()
+
+    try:
+        response = {"stdout": "hello world " * 10, "stderr": ""}
+        count_tokens._encoder = None
+        count_tokens.WARM_CACHE_FILE = Path(tempfile.gettempdir()) / "memento-no-such-cache"
+        cold = log_command.measure_output(response)
+
+        count_tokens.TIKTOKEN_AVAILABLE, count_tokens._encoder = True, WordEncoder()
+        warm = log_command.measure_output(response)
+
+        if (cold == {"output_tokens": 30, "output_chars": 120, "output_estimated": True}
+                and warm == {"output_tokens": 20, "output_chars": 120, "output_estimated": False}):
+            result.passed = True
+            result.message = "estimate without the warm cache, encoder count with it"
+        else:
+            result.message = f"cold {cold}, warm {warm}"
+    except Exception as e:
+        result.message = f"error: {e}"
+    finally:
+        count_tokens.TIKTOKEN_AVAILABLE, count_tokens._encoder, count_tokens.WARM_CACHE_FILE = saved
+
+    return result
+
+
+def test_simulator_mention_paths() -> TestResult:
+    """Test that mentions resolve ~ and root-relative paths; missing files and null sizes are errors."""
+    result = TestResult("Simulator mention paths")
+
+    saved_home = os.environ.get("HOME")
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp) / "project"
+            home = Path(tmp) / "home"
+            root.mkdir()
+            home.mkdir()
+            (root / "notes.md").write_text("word " * 400)
+            (home / "x.md").write_text("word " * 40)
+            os.environ["HOME"] = str(home)
+
+            sizes, _, labels = simulate_context.compile_events(
+                [{"type": "mention", "file": "notes.md"}, {"type": "mention", "file": "~/x.md"}],
+                root)
+            try:
+                simulate_context.compile_events([{"type": "mention", "file": "gone.md"}], root)
+                missing = None
+            except ValueError as e:
+                missing = str(e)
+            try:
+                simulate_context.compile_events([{"type": "message", "tokens": None}], root)
+                null = None
+            except ValueError as e:
+                null = str(e)
+
+        if (sizes[0] > sizes[1] > 0 and labels == ["@notes.md", "@~/x.md"]
+                and missing and "gone.md" in missing and null and "'tokens'" in null):
+            result.passed = True
+            result.message = f"sizes {sizes}; missing file: {missing}"
+        else:
+            result.message = f"sizes {sizes}, labels {labels}, missing {missing!r}, null {null!r}"
+    except Exception as e:
+        result.message = f"error: {e}"
+    finally:
+        if saved_home is None:
+            os.environ.pop("HOME", None)
+        else:
+            os.environ["HOME"] = saved_home
+
+    return result
+
+
+def test_trend_store_bounded() -> TestResult:
+    """Test that tiers stay capped, every point is counted once and a jump alerts."""
+    result = TestResult("Trend store bounded tiers")
+
+    try:
+        series = trend_store.new_series()
+        start = int(datetime(2024, 1, 1).timestamp())
+        n = 5000
+        for i in range(n):   # One point per hour for ~7 months
+            trend_store.add_point(series, 10000 + i % 7, start + i * 3600)
+        steady = trend_store.check_regression(series)
+        trend_store.add_point(series, 20000, start + n * 3600)
+        alert = trend_store.check_regression(series)
+
+        points = trend_store.query(series)
+        capped = all(len(series[name]) <= cap for name, _, cap in trend_store.TIERS)
+        counted = sum(p["count"] for p in points)
+        ordered = [p["start"] for p in points] == sorted(p["start"] for p in points)
+
+        if capped and counted == n + 1 and ordered and steady is None and alert:
+            result.passed = True
+            result.message = (f"{len(points)} points hold {counted} values; "
+                              f"+{alert['change_percent']}% alerts")
+        else:
+            result.message = (f"capped={capped}, counted={counted}, ordered={ordered}, "
+                              f"steady={steady}, alert={alert}")
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_forecast_measured_rate() -> TestResult:
+    """Test that the growth rate is fitted from measured command output, not final_tokens."""
+    result = TestResult("Forecast measured rate")
+
+    try:
+        start = datetime(2026, 1, 1, 9)
+        sessions, commands = [], []
+        for i in range(5):
+            begin = start + timedelta(days=i)
+            end = begin + timedelta(minutes=30)
+            sessions.append({
+                "project": "alpha", "started_at": begin.isoformat(), "ended_at": end.isoformat(),
+                "duration_minutes": 30, "baseline_tokens": 10000, "final_tokens": 10000 + 30 * 500
+            })
+            # 60000 output tokens in 30 minutes: 2000 tokens/minute
+            for minute in (5, 15, 25):
+                commands.append({"project": "alpha", "output_tokens": 20000,
+                                 "timestamp": (begin + timedelta(minutes=minute)).isoformat()})
+
+        rates = forecast_session.measured_rates(sessions, commands)
+        fit = forecast_session.fit_project(sessions, rates, "alpha")
+        unmeasured = forecast_session.fit_project(sessions, [], "alpha")
+        median_rate = round(forecast_session.math.exp(fit["rate"]["mu"]))
+
+        if (fit["rate_source"] == "project" and median_rate == 2000
+                and unmeasured["rate_source"] == "prior"
+                and unmeasured["duration_source"] == "project"):
+            result.passed = True
+            result.message = f"median {median_rate} tokens/min; prior without measurements"
+        else:
+            result.message = f"fit {fit}, unmeasured {unmeasured}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_export_metrics_incremental() -> TestResult:
+    """Test that the exporter only folds in new log lines and writes valid textfiles."""
+    result = TestResult("Metrics export incremental")
+
+    saved = {name: getattr(export_metrics, name)
+             for name in ("STATS_FILE", "COMMANDS_FILE", "TIMINGS_FILE", "STATE_FILE")}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in saved:
+                setattr(export_metrics, name, Path(tmp) / saved[name].name)
+            output = Path(tmp) / "memento.prom"
+            export_metrics.COMMANDS_FILE.write_text(json.dumps({"commands": [
+                {"command": "ls", "project": "alpha", "timestamp": "2026-01-01T09:00:00",
+                 "output_tokens": 40}
+            ]}))
+            export_metrics.record_timing("command", "alpha", 0.12)
+            first = export_metrics.export(output)["new"]
+
+            export_metrics.record_timing("command", "alpha", 0.3)
+            with open(export_metrics.TIMINGS_FILE, "a") as f:
+                f.write('{"hook":"command","proj')   # Line still being written
+            second = export_metrics.export(output, "openmetrics")["new"]
+            text = output.read_text()
+
+            # Without an exporter, hooks start an oversized log over
+            cap = export_metrics.MAX_TIMINGS_LOG_BYTES
+            export_metrics.MAX_TIMINGS_LOG_BYTES = 64
+            try:
+                for _ in range(10):
+                    export_metrics.record_timing("command", "alpha", 0.1)
+            finally:
+                export_metrics.MAX_TIMINGS_LOG_BYTES = cap
+            capped = export_metrics.TIMINGS_FILE.stat().st_size
+            third = export_metrics.export(output)["new"]
+            classic = output.read_text()
+
+        checks = [
+            first == {"sessions": 0, "commands": 1, "hook_runs": 1},
+            second == {"sessions": 0, "commands": 0, "hook_runs": 1},
+            capped < 200,
+            third["hook_runs"] >= 1,
+            'memento_commands_total{project="alpha"} 1\n' in text,
+            'memento_hook_duration_seconds_count{hook="command",project="alpha"} 2\n' in text,
+            'memento_hook_duration_seconds_bucket{hook="command",project="alpha",le="0.25"} 1\n' in text,
+            text.endswith("# EOF\n"),
+            "# TYPE memento_commands_total counter\n" in classic,
+            "# EOF" not in classic,
+            (export_metrics.process_age() or 0) > 0,
+        ]
+        if all(checks):
+            result.passed = True
+            result.message = "second run read only the new timing line"
+        else:
+            result.message = f"checks failed: {checks}"
+    except Exception as e:
+        result.message = f"error: {e}"
+    finally:
+        for name, value in saved.items():
+            setattr(export_metrics, name, value)
+
+    return result
+
+
+def test_command_normalisation() -> TestResult:
+    """Test that quoted arguments become <str> and quoted operators stay arguments."""
+    result = TestResult("Command normalisation")
+
+    cases = {
+        'git commit -m "fix"': [["git", "commit", "-m", "<str>"]],
+        "grep 'x' src/app.py | wc -l": [["grep", "<str>", "<path>"], ["wc", "-l"]],
+        'echo "|" && ls|"wc"': [["echo", "<str>"], ["ls"], ["wc"]],
+        "git log --oneline -5 > out.txt": [["git", "log", "--oneline", "<num>"]],
+        'FOO=1 echo "unbalanced': [["echo", "<str>"]],
+        "cat > notes.md <<'EOF'\nmake && deploy; then rm -rf build\nEOF\ngit add notes.md":
+            [["cat"], ["git", "add", "<path>"]],
+        "ls\npwd\ngit status": [["ls"], ["pwd"], ["git", "status"]],
+        "npm test 2>&1 | tee log": [["npm", "test"], ["tee", "log"]],
+        "echo 2 > out.txt": [["echo", "<num>"]],
+    }
+    try:
+        wrong = {c: command_stats.normalize(c) for c, expected in cases.items()
+                 if command_stats.normalize(c) != expected}
+        if not wrong:
+            result.passed = True
+            result.message = f"{len(cases)} command lines normalised as expected"
+        else:
+            result.message = f"got {wrong}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def _record_many(args: tuple) -> None:
+    path, worker = args
+    command_stats.TRIE_FILE = Path(path)
+    for i in range(10):
+        command_stats.record(f"git status {worker}", "alpha")
+
+
+def test_command_stats_concurrent_records() -> TestResult:
+    """Test that parallel hook processes never lose each other's counts."""
+    result = TestResult("Command stats concurrent records")
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "trie.json"
+            with multiprocessing.Pool(6) as pool:
+                pool.map(_record_many, [(str(path), w) for w in range(30)])
+            data = json.loads(path.read_text())
+            total = sum(trie["n"] for projects in data["days"].values()
+                        for trie in projects.values())
+
+        if total == 300:
+            result.passed = True
+            result.message = "300 records from 30 processes all counted"
+        else:
+            result.message = f"total {total} of 300"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_hook_payload_truncated_fields() -> TestResult:
+    """Test that small fields survive a cut payload and long strings end at the cut."""
+    result = TestResult("Hook payload truncated fields")
+
+    try:
+        stdout = 'say "hi"\\n\t✓ 😀\n' * 5000
+        data = json.dumps({
+            "cwd": "/home/me/project", "hook_event_name": "PostToolUse",
+            "tool_input": {"command": "cat log"},
+            "tool_response": {"stdout": stdout, "stderr": "", "interrupted": False}
+        }).encode()
+        fields = {"cwd": ("cwd",), "command": ("tool_input", "command"),
+                  "stdout": ("tool_response", "stdout"), "stderr": ("tool_response", "stderr")}
+
+        failures = []
+        start = data.index(b'"stdout": "') + len('"stdout": "')
+        for cap in range(start + 10, start + 50):   # Cuts inside every kind of escape
+            got = hook_payload.read_hook_payload(fields, io.BytesIO(data), max_bytes=cap)
+            values = got["fields"]
+            # At most one escape (a surrogate pair is 12 bytes) is dropped at the cut
+            kept = len(json.dumps(values["stdout"] or "")) - 2
+            if not (got["truncated"] and values["cwd"] == "/home/me/project"
+                    and values["command"] == "cat log" and values["stderr"] is None
+                    and stdout.startswith(values["stdout"])
+                    and cap - start - 12 < kept <= cap - start):
+                failures.append(cap)
+
+        if not failures:
+            result.passed = True
+            result.message = "cwd and command recovered at 40 cut points"
+        else:
+            result.message = f"wrong fields when cut at bytes {failures}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def test_hook_payload_overflow_unescaped() -> TestResult:
+    """Test that output past the cap reaches overflow unescaped, without JSON syntax."""
+    result = TestResult("Hook payload overflow")
+
+    try:
+        stdout = 'He said "hi" \\ tab\there — ✓ 😀 é\n' * 3000
+        failures = []
+        for ensure_ascii in (True, False):
+            data = json.dumps({
+                "cwd": "/x", "tool_input": {"command": "cat log"},
+                "tool_response": {"stdout": stdout, "stderr": "oops", "interrupted": False}
+            }, ensure_ascii=ensure_ascii).encode()
+            for cap in range(20000, 20030):
+                rest = []
+                got = hook_payload.read_hook_payload(
+                    {"stdout": ("tool_response", "stdout")}, io.BytesIO(data), max_bytes=cap,
+                    overflow=rest.append, overflow_keys=("stdout", "stderr"))
+                if got["fields"]["stdout"] + "".join(rest) != stdout + "oops":
+                    failures.append((ensure_ascii, cap))
+
+        if not failures:
+            result.passed = True
+            result.message = f"prefix + overflow == stdout + stderr ({len(stdout) + 4} chars) at 60 cuts"
+        else:
+            result.message = f"mismatch for (ensure_ascii, cap) {failures[:5]}"
+    except Exception as e:
+        result.message = f"error: {e}"
+
+    return result
+
+
+def run_tests():
+    """Run all tests and report results."""
+    print("=" * 60)
+    print("Memento Scripts Test Suite")
+    print("=" * 60)
+
+    results = []
+
+    print("\n[Binary Command Log Tests]")
+    for test in (test_command_log_round_trip, test_command_log_bad_entry_keeps_log,
+                 test_command_log_interleaved_writers,
+                 test_command_log_concurrent_processes, test_command_log_torn_tail,
+                 test_command_log_rotation):
+        r = test()
+        results.append(r)
+        print(r)
+
+    print("\n[Trend Store Tests]")
+    r = test_trend_store_bounded()
+    results.append(r)
+    print(r)
+
+    print("\n[Command Stats Tests]")
+    for test in (test_command_normalisation, test_command_stats_concurrent_records):
+        r = test()
+        results.append(r)
+        print(r)
+
+    print("\n[Hook Payload Tests]")
+    for test in (test_hook_payload_truncated_fields, test_hook_payload_overflow_unescaped):
+        r = test()
+        results.append(r)
+        print(r)
+
+    print("\n[Command Logger Tests]")
+    r = test_output_cost_counter()
+    results.append(r)
+    print(r)
+
+    print("\n[Simulator Tests]")
+    r = test_simulator_mention_paths()
+    results.append(r)
+    print(r)
+
+    print("\n[Forecast Tests]")
+    r = test_forecast_measured_rate()
+    results.append(r)
+    print(r)
+
+    print("\n[Metrics Exporter Tests]")
+    r = test_export_metrics_incremental()
+    results.append(r)
+    print(r)
+
+    # Summary
+    print("\n" + "=" * 60)
+    passed = sum(1 for r in results if r.passed)
+    total = len(results)
+    print(f"Results: {passed}/{total} tests passed")
+
+    if passed == total:
+        print("All tests passed!")
+        return 0
+    else:
+        failed = [r for r in results if not r.passed]
+        print(f"\nFailed tests:")
+        for r in failed:
+            print(f"  - {r.name}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(run_tests())